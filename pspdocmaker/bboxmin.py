@@ -2,7 +2,7 @@
 # BBOX minimal implementation for encrypted PS1 DOCUMENT.DAT
 
 from dataclasses import dataclass
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict
 from Crypto.Cipher import AES
 
 class BBoxException(Exception):
@@ -18,11 +18,19 @@ KEY_VAULT = {
     0x63: bytes([0x9C, 0x9B, 0x13, 0x72, 0xF8, 0xC6, 0x40, 0xCF, 0x1C, 0x62, 0xF5, 0xD5, 0x92, 0xDD, 0xB5, 0x82]),
 }
 
-def _encrypt_iv0(data: bytes, keyseed: int) -> bytes:
-    return AES.new(KEY_VAULT[keyseed], AES.MODE_CBC, b'\x00' * 16).encrypt(data)
+_K03 = int.from_bytes(KEY_VAULT[0x03], 'big')
 
-def _decrypt_iv0(data: bytes, keyseed: int) -> bytes:
-    return AES.new(KEY_VAULT[keyseed], AES.MODE_CBC, b'\x00' * 16).decrypt(data)
+# ECB objects keep no chaining state, so one instance per key can be reused
+_ECB = {k: AES.new(v, AES.MODE_ECB) for k, v in KEY_VAULT.items()}
+
+def _ecb_encrypt_block(data: bytes, keyseed: int) -> bytes:
+    return _ECB[keyseed].encrypt(data)
+
+def _ecb_decrypt_block(data: bytes, keyseed: int) -> bytes:
+    return _ECB[keyseed].decrypt(data)
+
+def _encrypt_cbc(data: bytes, keyseed: int, iv: bytes) -> bytes:
+    return AES.new(KEY_VAULT[keyseed], AES.MODE_CBC, bytes(iv)).encrypt(data)
 
 @dataclass
 class MACKey:
@@ -35,94 +43,71 @@ def BBMacInit(mkey: MACKey) -> int:
     mkey.key[:] = b'\x00' * 0x10
     mkey.pad[:] = b'\x00' * 0x10
 
-def _sub_158_encrypt_block(block: bytes, key: bytearray, key_type: int) -> Tuple[bytes, bytes]:
-    if len(block) % 0x10 != 0:
-        _raise('Encrypt block size must be multiple of 16')
-    
-    b = bytearray(block)
-    for i in range(0x10):
-        b[i] ^= key[i]
-    
-    ct = _encrypt_iv0(bytes(b), key_type)
-    
-    key_next = ct[-0x10:] if len(ct) >= 0x10 else (b'\x00' * 0x10)
-    return ct, key_next
-
 def BBMacUpdate(mkey: MACKey, buf: bytes):
     if mkey.pad_size > 16:
         _raise('MAC Key padding size must be do not exceed 16 bytes')
     
     size = len(buf)
-    data = memoryview(buf)
     
     if mkey.pad_size + size <= 0x10:
-        mkey.pad[mkey.pad_size:mkey.pad_size + size] = data.tobytes()
+        mkey.pad[mkey.pad_size:mkey.pad_size + size] = buf
         mkey.pad_size += size
         return
     
-    stream = bytes(mkey.pad[:mkey.pad_size]) + data.tobytes()
+    stream = bytearray(mkey.pad_size + size)
+    stream[:mkey.pad_size] = mkey.pad[:mkey.pad_size]
+    stream[mkey.pad_size:] = buf
     
     rem = (mkey.pad_size + size) & 0x0F
     if rem == 0:
         rem = 0x10
     
     full_len = len(stream) - rem
-    tail = stream[full_len:]
-    mkey.pad[:rem] = tail
+    mkey.pad[:rem] = stream[full_len:]
     mkey.pad_size = rem
     
-    p = 0
-    while p < full_len:
-        chunk = stream[p:p + min(0x0800, full_len - p)]
-        ct, key_next = _sub_158_encrypt_block(chunk, mkey.key, 0x38)
-        mkey.key[:] = key_next
-        p += len(chunk)
+    # CBC-MAC chain: the running key is the IV, only the last block is kept
+    ct = _encrypt_cbc(memoryview(stream)[:full_len], 0x38, mkey.key)
+    mkey.key[:] = ct[-0x10:]
 
 def left_shift_1(block16: bytes) -> bytes:
-    b = bytearray(0x10)
-    carry = 0
-    for i in reversed(range(0x10)):
-        v = block16[i]
-        b[i] = ((v << 1) & 0xFF) | carry
-        carry = 1 if (v & 0x80) else 0
-    if carry:
-        b[15] ^= 0x87
-    return bytes(b)
+    n = (int.from_bytes(block16, 'big') << 1) & ((1 << 128) - 1)
+    if block16[0] & 0x80:
+        n ^= 0x87
+    return n.to_bytes(0x10, 'big')
 
-def BBMacFinal(mkey: MACKey, out16: bytearray, vkey: Optional[bytes]) -> int:
+# CMAC subkeys of KEY_VAULT[0x38], precomputed:
+# L = AES(KEY_VAULT[0x38], 0), K1 = left_shift_1(L), K2 = left_shift_1(K1)
+_K1 = bytes([0x5B, 0x6E, 0x9F, 0xA7, 0x92, 0xAA, 0x53, 0x9C, 0xAB, 0xDE, 0x58, 0x32, 0x49, 0x96, 0x66, 0x28])
+_K2 = bytes([0xB6, 0xDD, 0x3F, 0x4F, 0x25, 0x54, 0xA7, 0x39, 0x57, 0xBC, 0xB0, 0x64, 0x93, 0x2C, 0xCC, 0x50])
+
+def _bbmac_cmac(mkey: MACKey) -> int:
     if mkey.pad_size > 0x10:
         _raise('MAC Key padding size must be do not exceed 16 bytes')
     
-    L = _encrypt_iv0(b'\x00' * 0x10, 0x38)
-    
-    K1 = left_shift_1(L)
-    K2 = left_shift_1(K1)
-    
     pad = bytearray(mkey.pad)
     if mkey.pad_size < 0x10:
         pad[mkey.pad_size] = 0x80
-        for j in range(mkey.pad_size + 1, 0x10):
-            pad[j] = 0x00
-        subkey = K2
+        pad[mkey.pad_size + 1:] = bytes(0x0F - mkey.pad_size)
+        subkey = _K2
     else:
-        subkey = K1
-    
-    for i in range(0x10):
-        pad[i] ^= subkey[i]
-    
-    final_block = bytes(pad)
-    ct, key_next = _sub_158_encrypt_block(final_block, mkey.key, 0x38)
-    tmp1 = bytearray(ct[-0x10:])
+        subkey = _K1
     
-    for i in range(0x10):
-        tmp1[i] ^= KEY_VAULT[0x03][i]
+    # single block CBC with the running key as IV == ECB of (block ^ key)
+    final_i = int.from_bytes(pad, 'big') ^ int.from_bytes(subkey, 'big') ^ int.from_bytes(mkey.key, 'big')
+    ct = _ecb_encrypt_block(final_i.to_bytes(0x10, 'big'), 0x38)
+    return int.from_bytes(ct, 'big')
+
+def BBMacFinal(mkey: MACKey, out16: bytearray, vkey: Optional[bytes]) -> int:
+    tmp_i = _bbmac_cmac(mkey) ^ _K03
     
     if vkey is not None:
         if len(vkey) != 0x10:
             _raise('Version Key must be 16 bytes')
-        for i in range(0x10):
-            tmp1[i] ^= vkey[i]
-        tmp1 = bytearray(_encrypt_iv0(bytes(tmp1), 0x38))
+        tmp_i ^= int.from_bytes(vkey, 'big')
+        tmp1 = _ecb_encrypt_block(tmp_i.to_bytes(0x10, 'big'), 0x38)
+    else:
+        tmp1 = tmp_i.to_bytes(0x10, 'big')
     
     out16[:0x10] = tmp1[:0x10]
     
@@ -135,17 +120,13 @@ def bbmac_getkey(mkey: MACKey, bbmac: bytes) -> int:
         _raise('BB MAC must be exactly 16 bytes')
     
     tmp = bytearray(0x10)
-    vkey_out = bytearray(0x10)
     BBMacFinal(mkey, tmp, None)
     
-    mac_working = bytearray(bbmac)
-    mac_working[:] = _decrypt_iv0(bytes(mac_working), 0x63)
-    decrypted = _decrypt_iv0(bytes(mac_working), 0x38)
-    
-    for i in range(0x10):
-        vkey_out[i] = tmp[i] ^ decrypted[i]
+    mac_working = _ecb_decrypt_block(bytes(bbmac), 0x63)
+    decrypted = _ecb_decrypt_block(mac_working, 0x38)
     
-    return vkey_out
+    vkey_out = int.from_bytes(tmp, 'big') ^ int.from_bytes(decrypted, 'big')
+    return bytearray(vkey_out.to_bytes(0x10, 'big'))
 
 def pops_get_secure_install_id(buf: bytes) -> bytes:
     if len(buf) != 0x70:
@@ -163,7 +144,6 @@ def bbox_mac_gen(buf: bytes, vkey: bytes) -> bytes:
     if len(vkey) != 0x10:
         _raise('version_key must be 16 bytes')
     
-    buf = bytes(buf)
     tmp = bytearray(0x10)
     
     mkey = MACKey(key=bytearray(0x10), pad=bytearray(0x10), pad_size=0)
@@ -176,5 +156,20 @@ def bbox_mac_gen(buf: bytes, vkey: bytes) -> bytes:
 def bbox_mac_gen_enc(buf: bytes, vkey: bytes) -> bytes:
     # POPS only, calculate BB Mac digest using version key (Secure Install ID)
     get_bb_mac = bbox_mac_gen(buf, vkey)
-    get_bb_mac_enc = _encrypt_iv0(get_bb_mac, 0x63)
+    get_bb_mac_enc = _ecb_encrypt_block(get_bb_mac, 0x63)
     return get_bb_mac_enc
+
+class BBMACSealer:
+    # bbox_mac_gen_enc for one version key, the KEY_VAULT[0x03] ^ vkey mask is folded once
+    def __init__(self, vkey: bytes):
+        if len(vkey) != 0x10:
+            _raise('version_key must be 16 bytes')
+        self._mix = _K03 ^ int.from_bytes(vkey, 'big')
+    
+    def seal(self, buf: bytes) -> bytes:
+        mkey = MACKey(key=bytearray(0x10), pad=bytearray(0x10), pad_size=0)
+        BBMacUpdate(mkey, buf)
+        
+        tmp_i = _bbmac_cmac(mkey) ^ self._mix
+        bb_mac = _ecb_encrypt_block(tmp_i.to_bytes(0x10, 'big'), 0x38)
+        return _ecb_encrypt_block(bb_mac, 0x63)
@@ -0,0 +1,70 @@
+# coding: utf-8
+
+import wx
+
+from .render import RenderSettings
+
+class ExtraRenderParamsDialog(wx.Dialog):
+    def __init__(self, parent):
+        super().__init__(parent, title='Set Extra Parameters:', style=wx.DEFAULT_DIALOG_STYLE)
+        rs = RenderSettings
+        
+        extra_params = {
+            # margins
+            'top':    rs.margin_top,
+            'left':   rs.margin_left,
+            'right':  rs.margin_right,
+            'bottom': rs.margin_bottom,
+            # spacing
+            'line_spacing': rs.line_spacing,
+            'indent_first': rs.indent_first_line,
+        }
+        
+        grid = wx.FlexGridSizer(rows=6, cols=2, vgap=8, hgap=10)
+        grid.AddGrowableCol(1, 1)
+        
+        def add_row(label, key, vmin, vmax):
+            grid.Add(wx.StaticText(self, label=label + ':'), 0, wx.ALIGN_CENTER_VERTICAL)
+            sc = wx.SpinCtrl(self, min=vmin, max=vmax, initial=int(extra_params.get(key, 0)))
+            grid.Add(sc, 0, wx.EXPAND)
+            return sc
+        
+        self.sc_top = add_row('Margin Top', 'top', 0, 50)
+        self.sc_left = add_row('Margin Left', 'left', 0, 50)
+        self.sc_right = add_row('Margin Right', 'right', 0, 50)
+        self.sc_bottom = add_row('Margin Bottom', 'bottom', 0, 50)
+        
+        self.sc_line_spacing = add_row('Line Spacing', 'line_spacing', 0, 10)
+        self.sc_indent_first = add_row('Indent First Line', 'indent_first', 0, 50)
+        
+        btns = self.CreateSeparatedButtonSizer(wx.OK | wx.CANCEL)
+        
+        s = wx.BoxSizer(wx.VERTICAL)
+        s.Add(grid, 0, wx.ALL | wx.EXPAND, 12)
+        s.Add(btns, 0, wx.ALL | wx.EXPAND, 12)
+        
+        self.SetSizerAndFit(s)
+        self.CentreOnParent()
+
+    def load_extra_params(self):
+        # refresh the fields when the dialog is shown again
+        rs = RenderSettings
+        
+        self.sc_top.SetValue(rs.margin_top)
+        self.sc_left.SetValue(rs.margin_left)
+        self.sc_right.SetValue(rs.margin_right)
+        self.sc_bottom.SetValue(rs.margin_bottom)
+        
+        self.sc_line_spacing.SetValue(rs.line_spacing)
+        self.sc_indent_first.SetValue(rs.indent_first_line)
+
+    def set_extra_params(self):
+        rs = RenderSettings
+        
+        rs.margin_top    = self.sc_top.GetValue()
+        rs.margin_left   = self.sc_left.GetValue()
+        rs.margin_right  = self.sc_right.GetValue()
+        rs.margin_bottom = self.sc_bottom.GetValue()
+        
+        rs.line_spacing      = self.sc_line_spacing.GetValue()
+        rs.indent_first_line = self.sc_indent_first.GetValue()
@@ -1,92 +1,135 @@
 # coding: utf-8
 
-from typing import List, Tuple, Optional, Iterable
+from functools import lru_cache
+from typing import List, Tuple, Optional, Iterable, Dict, TYPE_CHECKING
 from pathlib import Path
 import sys, os
+import subprocess
 
 from PIL import ImageFont
-import wx
+
+# wx is only needed to resolve GUI fonts, load_font stays usable without it
+if TYPE_CHECKING:
+    import wx
 
 class FontResolver:
     # Resolve wx.Font to a real font file path in a cross-platform way.
-    def resolve(self, wx_font: wx.Font) -> Optional[str]:
-        if sys.platform.startswith('win'):
-            return self._resolve_windows(wx_font)
-        else:
-            return self._resolve_linux(wx_font)
+    def resolve(self, wx_font: 'wx.Font') -> Optional[str]:
+        return self.resolve_face(*self.describe(wx_font))
     
-    # ---------------- Windows ----------------
+    @staticmethod
+    def describe(wx_font: 'wx.Font') -> Tuple[str, bool, bool, int]:
+        # (face, bold, italic, point size), read on the GUI thread
+        import wx
+        
+        return (
+            wx_font.GetFaceName(),
+            wx_font.GetWeight() >= wx.FONTWEIGHT_BOLD,
+            wx_font.GetStyle() in (wx.FONTSTYLE_ITALIC, wx.FONTSTYLE_SLANT),
+            wx_font.GetPointSize(),
+        )
     
-    def _resolve_windows(self, wx_font: wx.Font) -> Optional[str]:
-        try:
-            import winreg
-        except ImportError:
-            return None
+    # resolved (face, bold, italic, size) -> path lookups, misses included,
+    # shared by all resolvers; the oldest entry goes once the limit is hit
+    _MATCHES_MAX = 256
+    _matches: Dict[Tuple[str, bool, bool, int], Optional[str]] = {}
+    
+    def resolve_face(self, face: str, want_bold: bool, want_italic: bool, size: int = 0) -> Optional[str]:
+        # no wx objects involved, safe to call from a worker thread
+        is_win = sys.platform.startswith('win')
         
-        face = wx_font.GetFaceName()
-        if not face or face.startswith('@'):
-            return None
+        # the registry lookup does not depend on the size
+        key = (face, want_bold, want_italic, 0 if is_win else size)
+        if key in self._matches:
+            return self._matches[key]
         
-        want_bold = wx_font.GetWeight() >= wx.FONTWEIGHT_BOLD
-        want_italic = wx_font.GetStyle() in (
-            wx.FONTSTYLE_ITALIC,
-            wx.FONTSTYLE_SLANT,
-        )
+        if is_win:
+            result = self._resolve_windows(face, want_bold, want_italic)
+        else:
+            result = self._resolve_linux(face, want_bold, want_italic, size)
         
-        try:
+        if len(self._matches) >= self._MATCHES_MAX:
+            del self._matches[next(iter(self._matches))]
+        self._matches[key] = result
+        return result
+    
+    @classmethod
+    def clear_cache(cls) -> None:
+        # forget earlier lookups, e.g. after fonts were installed
+        cls._matches.clear()
+        cls._win_fonts = None
+    
+    # ---------------- Windows ----------------
+    
+    # registry font list {name_lower: file}, shared by all resolvers and filled on first use
+    _win_fonts: Optional[Dict[str, str]] = None
+    
+    @classmethod
+    def _windows_fonts(cls) -> Dict[str, str]:
+        if cls._win_fonts is None:
+            import winreg
+            
+            fonts = {}
             with winreg.OpenKey(
                 winreg.HKEY_LOCAL_MACHINE,
                 r'SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts',
             ) as key:
-            
-                best_match = None
-                
                 for i in range(winreg.QueryInfoKey(key)[1]):
                     name, value, _ = winreg.EnumValue(key, i)
-                    
-                    name_l = name.lower()
-                    face_l = face.lower()
-                    
-                    if face_l not in name_l:
-                        continue
-                    
-                    is_bold = 'bold' in name_l
-                    is_italic = 'italic' in name_l or 'oblique' in name_l
-                    
-                    # exact style match
-                    if is_bold == want_bold and is_italic == want_italic:
-                        best_match = value
-                        break
-                    
-                    # fallback: regular
-                    if best_match is None and not is_bold and not is_italic:
-                        best_match = value
-                
-                if best_match:
-                    fonts_dir = Path(os.environ.get('WINDIR', 'C:\\Windows')) / 'Fonts'
-                    return str(fonts_dir / best_match)
+                    fonts[name.lower()] = value
+            
+            cls._win_fonts = fonts
+        return cls._win_fonts
+    
+    def _resolve_windows(self, face: str, want_bold: bool, want_italic: bool) -> Optional[str]:
+        if not face or face.startswith('@'):
+            return None
         
+        face_l = face.lower()
+        
+        try:
+            fonts = self._windows_fonts()
         except Exception:
             return None
         
-        return None
+        best_match = None
+        
+        for name_l, value in fonts.items():
+            if face_l not in name_l:
+                continue
+            
+            is_bold = 'bold' in name_l
+            is_italic = 'italic' in name_l or 'oblique' in name_l
+            
+            # exact style match
+            if is_bold == want_bold and is_italic == want_italic:
+                best_match = value
+                break
+            
+            # fallback: regular
+            if best_match is None and not is_bold and not is_italic:
+                best_match = value
+        
+        if not best_match:
+            return None
+        
+        fonts_dir = Path(os.environ.get('WINDIR', 'C:\\Windows')) / 'Fonts'
+        return str(fonts_dir / best_match)
     
     # ---------------- Linux ----------------
     
-    def _resolve_linux(self, wx_font: wx.Font) -> Optional[str]:
-        family = wx_font.GetFaceName()
+    def _resolve_linux(self, family: str, want_bold: bool, want_italic: bool, size: int) -> Optional[str]:
         if not family:
             return None
         
         pattern_parts = [family]
         
-        if wx_font.GetWeight() >= wx.FONTWEIGHT_BOLD:
+        if want_bold:
             pattern_parts.append('weight=bold')
         
-        if wx_font.GetStyle() in (wx.FONTSTYLE_ITALIC, wx.FONTSTYLE_SLANT):
+        if want_italic:
             pattern_parts.append('slant=italic')
         
-        size = wx_font.GetPointSize()
         if size > 0:
             pattern_parts.append(f'size={size}')
         
@@ -108,6 +151,8 @@ class FontResolver:
         
         return None
 
+# faces are read-only once loaded, so every render with the same font/size shares one
+@lru_cache(maxsize=32)
 def load_font(font_path: Optional[str], size: int) -> ImageFont.FreeTypeFont:
     if not font_path:
         raise ValueError('Font path is not set')
@@ -116,3 +161,8 @@ def load_font(font_path: Optional[str], size: int) -> ImageFont.FreeTypeFont:
         return ImageFont.truetype(font_path, size)
     except Exception as e:
         raise RuntimeError(f'Failed to load font:\n{font_path}\n{e}')
+
+@lru_cache(maxsize=32)
+def font_face_name(font_path: str) -> str:
+    # the family name does not depend on the size, so parse once at the smallest one
+    return ImageFont.truetype(font_path, 1).getname()[0]
@@ -1,5 +1,8 @@
 # coding: utf-8
 
+_HEX = [f'{b:02x}' for b in range(256)]
+_ASC = bytes(b if 32 <= b <= 126 else 0x2E for b in range(256))
+
 def hexdump(data: bytes, start_offset: int = 0) -> str:
     if start_offset < 0:
         raise ValueError('start_offset must be >= 0')
@@ -7,13 +10,13 @@ def hexdump(data: bytes, start_offset: int = 0) -> str:
     fmt = '{:08x}  {:23}  {:23}  |{:16}|'
     base, pad, i, out = start_offset & ~0xF, start_offset & 0xF, 0, []
     
-    hx = lambda bs: ' '.join(('  ' if b is None else f'{b:02x}') for b in bs).ljust(23)
-    asc = lambda bs: ''.join('.' if b is None else (chr(b) if 32 <= b <= 126 else '.') for b in bs)
-    
     while i < len(data):
         take = min(16 - pad, len(data) - i)
-        cells = [None] * pad + list(data[i:i + take]) + [None] * (16 - pad - take)
-        out.append(fmt.format(base, hx(cells[:8]), hx(cells[8:]), asc(cells)))
+        row = bytes(data[i:i + take])
+        tail = 16 - pad - take
+        cells = ['  '] * pad + [_HEX[b] for b in row] + ['  '] * tail
+        asc = '.' * pad + row.translate(_ASC).decode('ascii') + '.' * tail
+        out.append(fmt.format(base, ' '.join(cells[:8]), ' '.join(cells[8:]), asc))
         i, base, pad = i + take, base + 16, 0
     
     out.append(f'{start_offset + len(data):08x}')
@@ -1,11 +1,15 @@
 # coding: utf-8
 
 from typing import List, Tuple, Optional, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import hashlib
 import struct
 import hmac
+import mmap
 import os
+import threading
 
 import wx
 
@@ -16,7 +20,7 @@ except ImportError as e:
 
 from .hexdump import hexdump
 from .utils import ensure_dir
-from .bboxmin import bbox_mac_gen_enc
+from .bboxmin import BBMACSealer
 from .doc_keys import KEY_VAULT
 
 PS1_DES_KEY = bytes([0x39, 0xF7, 0xEF, 0xA1, 0x6C, 0xCE, 0x5F, 0x4C])
@@ -30,24 +34,40 @@ PS3_HMAC_KEY = bytes([0xEF, 0x69, 0x0E, 0xC0, 0xE0, 0xBF, 0xA4, 0x1F, 0x08, 0x45
 
 POPS_VER_KEY = bytes([0x2E, 0x41, 0x17, 0xA5, 0x32, 0xE6, 0xC4, 0x73, 0x71, 0x7B, 0x0F, 0x7A, 0x6E, 0xC0, 0xAA, 0xA5])
 
-def desDecrypt(doc_type: int, data: bytes) -> bytes:
+def desDecrypt(doc_type: int, data: bytes, output: Optional[memoryview] = None) -> Optional[bytes]:
     DES_KEY = PS1_DES_KEY if doc_type == 0 else PSP_DES_KEY
     DES_IV  = PS1_DES_IV  if doc_type == 0 else PSP_DES_IV
     
     cipher = DES.new(DES_KEY, DES.MODE_CBC, DES_IV)
-    return cipher.decrypt(data)
+    return cipher.decrypt(data, output=output)
 
-def desCustomDecrypt(doc_key: bytes, data: bytes) -> bytes:
+def desCustomDecrypt(doc_key: bytes, data: bytes, output: Optional[memoryview] = None) -> Optional[bytes]:
     DES_KEY = desChangeKey(doc_key)
     DES_IV  = PSP_DES_IV
     
     cipher = DES.new(DES_KEY, DES.MODE_CBC, DES_IV)
-    return cipher.decrypt(data)
+    return cipher.decrypt(data, output=output)
+
+_DES_ECB = {
+    0: DES.new(PS1_DES_KEY, DES.MODE_ECB),
+    1: DES.new(PSP_DES_KEY, DES.MODE_ECB),
+}
 
 def desEncrypt(doc_type: int, data: bytes) -> bytes:
     DES_KEY = PS1_DES_KEY if doc_type == 0 else PSP_DES_KEY
     DES_IV  = PS1_DES_IV  if doc_type == 0 else PSP_DES_IV
     
+    if len(data) <= 0x20:
+        # page headers: chain CBC by hand on the shared ECB cipher
+        ecb = _DES_ECB[0 if doc_type == 0 else 1]
+        out = bytearray(len(data))
+        prev = int.from_bytes(DES_IV, 'big')
+        for o in range(0, len(data), 8):
+            block = (int.from_bytes(data[o:o + 8], 'big') ^ prev).to_bytes(8, 'big')
+            out[o:o + 8] = ecb.encrypt(block)
+            prev = int.from_bytes(out[o:o + 8], 'big')
+        return bytes(out)
+    
     cipher = DES.new(DES_KEY, DES.MODE_CBC, DES_IV)
     return cipher.encrypt(data)
 
@@ -59,17 +79,50 @@ def desChangeKey(doc_key: bytes) -> bytes:
 def sha1hash(data: bytes) -> bytes:
     return hashlib.sha1(data).digest()[:0x10]
 
+# keyed HMAC states for the fixed keys, cloned per message to skip the key setup
+_HMAC_TEMPLATES = {
+    PSP_HMAC_KEY: hmac.new(PSP_HMAC_KEY, digestmod=hashlib.sha1),
+    PS3_HMAC_KEY: hmac.new(PS3_HMAC_KEY, digestmod=hashlib.sha1),
+}
+
 def sha1hmac(key: bytes, data: bytes) -> bytes:
-    return hmac.new(key, data, hashlib.sha1).digest()[:0x10]
+    tpl = _HMAC_TEMPLATES.get(key)
+    if tpl is None:
+        return hmac.new(key, data, hashlib.sha1).digest()[:0x10]
+    h = tpl.copy()
+    h.update(data)
+    return h.digest()[:0x10]
 
 def makehash(doc_type: int, data: bytes) -> bytes:
     if doc_type == 0:
-        return hashlib.sha1(data).digest()[:0x10]
+        return sha1hash(data)
     if doc_type == 1:
-        return hmac.new(PSP_HMAC_KEY, data, hashlib.sha1).digest()[:0x10]
+        return sha1hmac(PSP_HMAC_KEY, data)
+
+def padded_size(size: int, block_size: int = 16) -> int:
+    return size + (-size % block_size)
+
+def hash_block(doc_type: int, sealer: Optional[BBMACSealer], data: bytes) -> bytes:
+    if doc_type == 0:
+        return sealer.seal(data) + sha1hash(data)
+    return bytes(0x10) + sha1hmac(PSP_HMAC_KEY, data) + sha1hmac(PS3_HMAC_KEY, data)
+
+def seal_page(doc_type: int, sealer: Optional[BBMACSealer], page: bytes) -> bytearray:
+    # header + zero padded page + hash block, built in one buffer
+    hash_block_size = 0x20 if doc_type == 0 else 0x30
+    body_len = 0x20 + padded_size(len(page))
+    page_len = body_len + hash_block_size
+    page_info_head = bytearray(0x20)
+    struct.pack_into('<I', page_info_head, 0, page_len)
+    
+    p = bytearray(page_len)
+    p[:0x20] = desEncrypt(doc_type, page_info_head)
+    p[0x20:0x20 + len(page)] = page
+    p[body_len:] = hash_block(doc_type, sealer, memoryview(p)[:body_len])
+    return p
 
-def gen_pad(buf: bytes, block_size: int = 16) -> bytes:
-    return buf + b'\x00' * (-len(buf) % block_size)
+# page table entry: PSP offset/size at 0x00/0x0C, PS3 offset/size at 0x10/0x1C
+_PAGE_ENTRY = struct.Struct('<I8xII8xI96x')
 
 def create_header(gameid, pages):
     buf = bytearray(0x60)
@@ -80,43 +133,64 @@ def create_header(gameid, pages):
     struct.pack_into('<I', buf, 0x1C, 0 if len(pages) < 100 else 1)
     return buf
 
+def _on_gui_thread(fn, *args):
+    # dialogs must run on the GUI thread, packing itself may run on a worker
+    if wx.IsMainThread():
+        return fn(*args)
+    
+    done = threading.Event()
+    result = []
+    
+    def call():
+        try:
+            result.append(fn(*args))
+        finally:
+            done.set()
+    
+    wx.CallAfter(call)
+    done.wait()
+    return result[0] if result else None
+
+def _confirm_overwrite(path) -> bool:
+    dlg = wx.MessageDialog(
+        wx.GetApp().GetTopWindow(),
+        f"The file:\n\n{path}\n\nalready exists.\nDo you want to overwrite it?",
+        "Confirm Overwrite",
+        wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING
+    )
+    ans = dlg.ShowModal()
+    dlg.Destroy()
+    return ans == wx.ID_YES
+
 def pack_pngs_to_dat(game_id: str, doc_type: int, ins_id: bytes, png_paths: List[Path], out_dir: Path) -> None:
+    # file reads release the GIL, keep several in flight
+    with ThreadPoolExecutor(max_workers=32) as ex:
+        pages = list(ex.map(Path.read_bytes, png_paths))
+    
+    pack_png_blobs_to_dat(game_id, doc_type, ins_id, pages, out_dir)
+
+def pack_png_blobs_to_dat(game_id: str, doc_type: int, ins_id: bytes, pages: List[bytes], out_dir: Path) -> None:
     out_dat = out_dir / 'DOCUMENT.DAT'
     out_key = out_dir / 'KEYS.BIN'
     ensure_dir(out_dir)
     
     if os.path.exists(out_dat):
-        ow_dlg = wx.MessageDialog(
-            wx.GetApp().GetTopWindow(),
-            f"The file:\n\n{out_dat}\n\nalready exists.\nDo you want to overwrite it?",
-            "Confirm Overwrite",
-            wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING
-        )
-        ow_ans = ow_dlg.ShowModal()
-        ow_dlg.Destroy()
-        
-        if ow_ans != wx.ID_YES:
+        if not _on_gui_thread(_confirm_overwrite, out_dat):
             return
     
-    if len(png_paths) > 999:
-        wx.MessageBox('Maximum 999 pages allowed, pages starting from 1000 will not be written!', 'Warning', wx.ICON_WARNING)
-        del png_paths[999:]
+    if len(pages) > 999:
+        _on_gui_thread(wx.MessageBox, 'Maximum 999 pages allowed, pages starting from 1000 will not be written!', 'Warning', wx.ICON_WARNING)
+        pages = pages[:999]
     
     if doc_type not in (0, 1):
-        wx.MessageBox(f'Bad DOC parameters', 'Error', wx.ICON_ERROR)
+        _on_gui_thread(wx.MessageBox, f'Bad DOC parameters', 'Error', wx.ICON_ERROR)
         return
     
-    pgd_buf = b'\0PGD\1\0\0\0\1\0\0\0\0\0\0\0'
-    doc_hdr = desEncrypt(doc_type, create_header(game_id, png_paths))
-    
-    if doc_type == 0:
-        pgd_buf += doc_hdr + bbox_mac_gen_enc(doc_hdr, ins_id) + sha1hash(doc_hdr)
-    if doc_type == 1:
-        pgd_buf += doc_hdr + bytes(0x10) + sha1hmac(PSP_HMAC_KEY, doc_hdr) + sha1hmac(PS3_HMAC_KEY, doc_hdr)
+    pgd_header = b'\0PGD\1\0\0\0\1\0\0\0\0\0\0\0'
+    doc_hdr = desEncrypt(doc_type, create_header(game_id, pages))
     
-    pages = []
-    for p in png_paths:
-        pages.append(gen_pad(p.read_bytes()))
+    hash_block_size = 0x20 if doc_type == 0 else 0x30
+    sealer = BBMACSealer(ins_id) if doc_type == 0 else None
     
     page_count = len(pages)
     
@@ -125,41 +199,43 @@ def pack_pngs_to_dat(game_id: str, doc_type: int, ins_id: bytes, png_paths: List
     
     ps3_page_count_offset = 0x3188 if page_count < 100 else 0x1f388
     
-    hash_block_size = 0x20 if doc_type == 0 else 0x30
-    page_offset = len(pgd_buf) + info_block_size + hash_block_size + 0x08
+    header_size = len(pgd_header) + len(doc_hdr) + hash_block_size
+    page_offset = header_size + info_block_size + hash_block_size + 0x08
     
     struct.pack_into('<I', info_buffer, 0x00, 0xffffffff)
     struct.pack_into('<I', info_buffer, 0x04, page_count)
     struct.pack_into('<I', info_buffer, ps3_page_count_offset, page_count)
     
-    for i, p in enumerate(pages):
-        page_len = 0x20 + len(p) + hash_block_size
-        struct.pack_into('<I', info_buffer, 0x08 + i * 0x80 + 0x00, page_offset)
-        struct.pack_into('<I', info_buffer, 0x08 + i * 0x80 + 0x0c, page_len)
-        struct.pack_into('<I', info_buffer, 0x08 + i * 0x80 + 0x10, page_offset)
-        struct.pack_into('<I', info_buffer, 0x08 + i * 0x80 + 0x1c, page_len)
+    entries = []
+    for p in pages:
+        page_len = 0x20 + padded_size(len(p)) + hash_block_size
+        entries.append(_PAGE_ENTRY.pack(page_offset, page_len, page_offset, page_len))
         page_offset += page_len
+    info_buffer[0x08:0x08 + page_count * _PAGE_ENTRY.size] = b''.join(entries)
     
     info_buffer = desEncrypt(doc_type, info_buffer)
     
-    if doc_type == 0:
-        pgd_buf += info_buffer + bbox_mac_gen_enc(info_buffer, ins_id) + sha1hash(info_buffer)
-    if doc_type == 1:
-        pgd_buf += info_buffer + bytes(0x10) + sha1hmac(PSP_HMAC_KEY, info_buffer) + sha1hmac(PS3_HMAC_KEY, info_buffer)
+    # page_offset now points past the last page, i.e. the final file size
+    pgd_buf = bytearray(page_offset)
+    off = 0
     
-    pgd_buf += bytes(0x08)
+    def put(data: bytes) -> None:
+        nonlocal off
+        pgd_buf[off:off + len(data)] = data
+        off += len(data)
     
-    for i, p in enumerate(pages):
-        page_len = 0x20 + len(p) + hash_block_size
-        page_info_head = bytearray(0x20)
-        struct.pack_into('<I', page_info_head, 0, page_len)
-        
-        p = desEncrypt(doc_type, page_info_head) + p
-        
-        if doc_type == 0:
-            pgd_buf += p + bbox_mac_gen_enc(p, ins_id) + sha1hash(p)
-        if doc_type == 1:
-            pgd_buf += p + bytes(0x10) + sha1hmac(PSP_HMAC_KEY, p) + sha1hmac(PS3_HMAC_KEY, p)
+    put(pgd_header)
+    put(doc_hdr)
+    put(hash_block(doc_type, sealer, doc_hdr))
+    
+    put(info_buffer)
+    put(hash_block(doc_type, sealer, info_buffer))
+    off += 0x08
+    
+    # pages are sealed independently; hashlib and pycryptodome drop the GIL
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for sealed in ex.map(partial(seal_page, doc_type, sealer), pages):
+            put(sealed)
     
     with out_dat.open('wb') as f:
         f.write(pgd_buf)
@@ -172,17 +248,7 @@ def pack_pngs_to_dat(game_id: str, doc_type: int, ins_id: bytes, png_paths: List
                 e_key = f.read()
             
             if e_key != ins_id and len(e_key) == 0x10:
-                owk_dlg = wx.MessageDialog(
-                    wx.GetApp().GetTopWindow(),
-                    f"The file:\n\n{out_key}\n\nalready exists.\nDo you want to overwrite it?",
-                    "Confirm Overwrite",
-                    wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING
-                )
-            
-                owk_ans = owk_dlg.ShowModal()
-                owk_dlg.Destroy()
-            
-                if owk_ans != wx.ID_YES:
+                if not _on_gui_thread(_confirm_overwrite, out_key):
                     write_key = False
         
         if write_key:
@@ -190,7 +256,7 @@ def pack_pngs_to_dat(game_id: str, doc_type: int, ins_id: bytes, png_paths: List
                 f.write(ins_id)
             out_dat = str(out_dat) +  '\n' + str(out_key)
     
-    wx.MessageBox(f'Created:\n{out_dat}', 'Success', wx.OK | wx.ICON_INFORMATION)
+    _on_gui_thread(wx.MessageBox, f'Created:\n{out_dat}', 'Success', wx.OK | wx.ICON_INFORMATION)
 
 def extract_pngs_from_dat(dat_path: Path, out_dir: Path) -> List[Path]:
     try:
@@ -199,153 +265,155 @@ def extract_pngs_from_dat(dat_path: Path, out_dir: Path) -> List[Path]:
         needle_buf = b'IEND\xAE\x42\x60\x82'
         png_min_size = 0x43
         
-        data = dat_path.read_bytes()
-        ensure_dir(out_dir)
-        out_files = []
-        doc_key = None
-        idx = 0
-        
-        if data[0x00:0x0C] == doc_header:
-            for blob in iter_png_blobs_from_dat(data):
-                out = out_dir / f'DOC_{idx + 1:04d}.png'
-                out.write_bytes(blob)
-                out_files.append(out)
-                idx += 1
-            return out_files
-        
-        if data[0x00:0x10] == pgd_header:
-            ps1doc = desDecrypt(0, data[0x10:0x70])
-            pspdoc = desDecrypt(1, data[0x10:0x70])
-            doc_type = None
+        with open(dat_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            ensure_dir(out_dir)
+            out_files = []
+            doc_key = None
+            idx = 0
+            
+            if data[0x00:0x0C] == doc_header:
+                for blob in iter_png_blobs_from_dat(data):
+                    out = out_dir / f'DOC_{idx + 1:04d}.png'
+                    out.write_bytes(blob)
+                    out_files.append(out)
+                    idx += 1
+                return out_files
             
-            match ps1doc[:0x0C], pspdoc[:0x0C]:
-                case (h, _) if h == doc_header:
+            if data[0x00:0x10] == pgd_header:
+                ps1doc = desDecrypt(0, data[0x10:0x70])
+                
+                if ps1doc[:0x0C] == doc_header:
                     doc_type = 0
                     doc_size_flag = int.from_bytes(ps1doc[0x1C:0x20], 'little')
-                case (_, h) if h == doc_header:
-                    doc_type = 1
-                    doc_size_flag = int.from_bytes(pspdoc[0x1C:0x20], 'little')
-                case _:
-                    doc_type = 1
-                    doc_size_flag = -1
-            
-            header_hash = makehash(doc_type, data[0x10:0x70])
-            if makehash(doc_type, data[0x10:0x70]) != data[0x80:0x90]:
-                return []
-            
-            if data[0x70:0x80] == bytes(0x10) and doc_size_flag == -1:
-                key_id = data[0x10:0x18].hex('-').upper()
-                if key_id in KEY_VAULT:
-                    doc_key = KEY_VAULT[key_id]
-                    pspdoc = desCustomDecrypt(doc_key, data[0x10:0x70])
-                    doc_size_flag = int.from_bytes(pspdoc[0x1C:0x20], 'little')
                 else:
+                    # only try the PSP key when the PS1 one does not match
+                    pspdoc = desDecrypt(1, data[0x10:0x70])
+                    doc_type = 1
+                    if pspdoc[:0x0C] == doc_header:
+                        doc_size_flag = int.from_bytes(pspdoc[0x1C:0x20], 'little')
+                    else:
+                        doc_size_flag = -1
+                
+                header_hash = makehash(doc_type, data[0x10:0x70])
+                if header_hash != data[0x80:0x90]:
                     return []
-            
-            if doc_size_flag not in (0, 1):
-                return []
-            
-            doc_meta_offset = 0x00A0 if doc_type == 1 else 0x0090
-            doc_meta_size = 0x1F3E8 if doc_size_flag == 1 else 0x31E8
-            doc_meta_size += doc_meta_offset
-            
-            doc_meta = data[doc_meta_offset:doc_meta_size]
-            if makehash(doc_type, doc_meta) != data[doc_meta_size+0x10:doc_meta_size+0x20]:
-                return []
-            
-            if doc_key is not None:
-                doc_meta = desCustomDecrypt(doc_key, doc_meta)
-            else:
-                doc_meta = desDecrypt(doc_type, doc_meta)
-            if doc_meta[:0x04] != (-1).to_bytes(4, 'big', signed = True):
-                return []
-            
-            page_count = int.from_bytes(doc_meta[0x04:0x08], 'little')
-            doc_meta = doc_meta[0x08:]
-            
-            if page_count > 99 and doc_size_flag < 1:
-                return []
-            
-            page_meta = []
-            for pi in range(page_count):
-                page_entry = doc_meta[pi * 0x80:(pi+1) * 0x80]
                 
-                p = {}
-                p['offset'] = int.from_bytes(page_entry[0x00:0x04], 'little')
-                p['size']   = int.from_bytes(page_entry[0x0C:0x10], 'little')
-                # p3_offset = int.from_bytes(page_entry[0x10:0x14], 'little')
-                # p3_size   = int.from_bytes(page_entry[0x1C:0x20], 'little')
-                page_meta.append(p)
-            
-            for pi in range(len(page_meta)):
-                ofs = page_meta[pi]['offset']
-                sz = page_meta[pi]['size']
+                if data[0x70:0x80] == bytes(0x10) and doc_size_flag == -1:
+                    key_id = data[0x10:0x18].hex('-').upper()
+                    if key_id in KEY_VAULT:
+                        doc_key = KEY_VAULT[key_id]
+                        pspdoc = desCustomDecrypt(doc_key, data[0x10:0x70])
+                        doc_size_flag = int.from_bytes(pspdoc[0x1C:0x20], 'little')
+                    else:
+                        return []
                 
-                page_buf = data[ofs:ofs+sz]
-                hsz = 0x30 if doc_type == 1 else 0x20
+                if doc_size_flag not in (0, 1):
+                    return []
                 
-                page_hash = page_buf[-hsz:]
-                page_buf = page_buf[:-hsz]
+                doc_meta_offset = 0x00A0 if doc_type == 1 else 0x0090
+                doc_meta_size = 0x1F3E8 if doc_size_flag == 1 else 0x31E8
+                doc_meta_size += doc_meta_offset
                 
-                if makehash(doc_type, page_buf) != page_hash[0x10:0x20]:
-                    continue
+                doc_meta = data[doc_meta_offset:doc_meta_size]
+                if makehash(doc_type, doc_meta) != data[doc_meta_size+0x10:doc_meta_size+0x20]:
+                    return []
                 
                 if doc_key is not None:
-                    page_info_head = desCustomDecrypt(doc_key, page_buf[0x00:0x20])
+                    doc_meta = desCustomDecrypt(doc_key, doc_meta)
                 else:
-                    page_info_head = desDecrypt(doc_type, page_buf[0x00:0x20])
-                page_size  = int.from_bytes(page_info_head[0x00:0x04], 'little')
-                enc_chunks = int.from_bytes(page_info_head[0x08:0x0C], 'little')
+                    doc_meta = desDecrypt(doc_type, doc_meta)
+                if doc_meta[:0x04] != (-1).to_bytes(4, 'big', signed = True):
+                    return []
+                
+                page_count = int.from_bytes(doc_meta[0x04:0x08], 'little')
+                doc_meta = doc_meta[0x08:]
                 
-                subheader_out = bytes(enc_chunks * 0x08)
-                payload_offset = 0x20 + len(subheader_out)
+                if page_count > 99 and doc_size_flag < 1:
+                    return []
                 
-                if page_size != sz:
-                    continue
+                page_meta = []
+                for pi in range(page_count):
+                    page_entry = doc_meta[pi * 0x80:(pi+1) * 0x80]
+                    
+                    p = {}
+                    p['offset'] = int.from_bytes(page_entry[0x00:0x04], 'little')
+                    p['size']   = int.from_bytes(page_entry[0x0C:0x10], 'little')
+                    # p3_offset = int.from_bytes(page_entry[0x10:0x14], 'little')
+                    # p3_size   = int.from_bytes(page_entry[0x1C:0x20], 'little')
+                    page_meta.append(p)
                 
-                if enc_chunks > 0:
-                    subheader_out = page_buf[0x20:0x20 + enc_chunks * 0x08]
+                for pi in range(len(page_meta)):
+                    ofs = page_meta[pi]['offset']
+                    sz = page_meta[pi]['size']
+                    
+                    page_buf = data[ofs:ofs+sz]
+                    hsz = 0x30 if doc_type == 1 else 0x20
+                    
+                    page_hash = page_buf[-hsz:]
+                    page_buf = page_buf[:-hsz]
+                    
+                    if makehash(doc_type, page_buf) != page_hash[0x10:0x20]:
+                        continue
+                    
                     if doc_key is not None:
-                        subheader_out = desCustomDecrypt(doc_key, subheader_out)
+                        page_info_head = desCustomDecrypt(doc_key, page_buf[0x00:0x20])
                     else:
-                        subheader_out = desDecrypt(doc_type, subheader_out)
-                
-                page_buf = bytearray(page_buf[payload_offset:])
-                if len(page_buf) < png_min_size:
-                    continue
-                
-                if len(subheader_out) > 0:
-                    for j in range(enc_chunks):
-                        enc_chunk_offset = int.from_bytes(subheader_out[j * 0x08 + 0x00:j * 0x08 + 0x04], 'little')
-                        enc_chunk_size   = int.from_bytes(subheader_out[j * 0x08 + 0x04:j * 0x08 + 0x08], 'little')
-                        enc_chunk        = page_buf[enc_chunk_offset:enc_chunk_offset + enc_chunk_size]
-                        
+                        page_info_head = desDecrypt(doc_type, page_buf[0x00:0x20])
+                    page_size  = int.from_bytes(page_info_head[0x00:0x04], 'little')
+                    enc_chunks = int.from_bytes(page_info_head[0x08:0x0C], 'little')
+                    
+                    subheader_out = bytes(enc_chunks * 0x08)
+                    payload_offset = 0x20 + len(subheader_out)
+                    
+                    if page_size != sz:
+                        continue
+                    
+                    if enc_chunks > 0:
+                        subheader_out = page_buf[0x20:0x20 + enc_chunks * 0x08]
                         if doc_key is not None:
-                            dec_chunk = desCustomDecrypt(doc_key, enc_chunk)
+                            subheader_out = desCustomDecrypt(doc_key, subheader_out)
                         else:
-                            dec_chunk = desDecrypt(doc_type, enc_chunk)
-                        page_buf[enc_chunk_offset:enc_chunk_offset + enc_chunk_size] = dec_chunk
-                
-                needle_idx = page_buf.rfind(needle_buf)
-                if needle_idx == -1:
-                    continue
+                            subheader_out = desDecrypt(doc_type, subheader_out)
+                    
+                    page_buf = bytearray(page_buf[payload_offset:])
+                    if len(page_buf) < png_min_size:
+                        continue
+                    
+                    if len(subheader_out) > 0:
+                        with memoryview(page_buf) as page_mv:
+                            for j in range(enc_chunks):
+                                enc_chunk_offset = int.from_bytes(subheader_out[j * 0x08 + 0x00:j * 0x08 + 0x04], 'little')
+                                enc_chunk_size   = int.from_bytes(subheader_out[j * 0x08 + 0x04:j * 0x08 + 0x08], 'little')
+                                enc_chunk        = page_mv[enc_chunk_offset:enc_chunk_offset + enc_chunk_size]
+                                
+                                # decrypt in place, the chunk is its own output buffer
+                                if doc_key is not None:
+                                    desCustomDecrypt(doc_key, enc_chunk, output=enc_chunk)
+                                else:
+                                    desDecrypt(doc_type, enc_chunk, output=enc_chunk)
+                    
+                    needle_idx = page_buf.rfind(needle_buf)
+                    if needle_idx == -1:
+                        continue
+                    
+                    png_size = needle_idx + len(needle_buf)
+                    if png_size < png_min_size:
+                        continue
+                    
+                    page_buf = page_buf[:png_size]
+                    out = out_dir / f'DOC_{idx + 1:04d}.png'
+                    out.write_bytes(page_buf)
+                    out_files.append(out)
+                    idx += 1
                 
-                png_size = needle_idx + len(needle_buf)
-                if png_size < png_min_size:
-                    continue
-                
-                page_buf = page_buf[:png_size]
-                out = out_dir / f'DOC_{idx + 1:04d}.png'
-                out.write_bytes(page_buf)
-                out_files.append(out)
-                idx += 1
+                return out_files
             
-            return out_files
-        
-        return []
+            return []
     except:
         return []
 
+_PNG_CHUNK_HDR = struct.Struct('>I4s')
+
 def iter_png_blobs_from_dat(data: bytes) -> Iterable[bytes]:
     PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
     
@@ -359,8 +427,7 @@ def iter_png_blobs_from_dat(data: bytes) -> Iterable[bytes]:
         p = s + len(PNG_SIGNATURE)
         try:
             while p + 8 <= n:
-                length = int.from_bytes(data[p:p+4], 'big', signed=False)
-                ctype = data[p+4:p+8]
+                length, ctype = _PNG_CHUNK_HDR.unpack_from(data, p)
                 p += 8
                 if p + length + 4 > n:
                     raise ValueError('Truncated chunk')
@@ -372,6 +439,6 @@ def iter_png_blobs_from_dat(data: bytes) -> Iterable[bytes]:
                     i = p
                     break
             else:
-                i = s + 1
+                i = s + len(PNG_SIGNATURE)
         except Exception:
-            i = s + 1
+            i = s + len(PNG_SIGNATURE)
@@ -1,17 +1,25 @@
 # coding: utf-8
 
-from dataclasses import dataclass
-from functools import lru_cache
-from typing import List, Tuple, Optional, Iterable
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from functools import lru_cache, partial
+from typing import List, Tuple, Optional, Iterable, Iterator, Callable
 from pathlib import Path
+import multiprocessing
+import os
 import random
 import re
 
-import wx
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 
 from .font_resolver import load_font
-from .utils import get_w, clamp
+from .utils import make_width_fn, clamp
+
+# below this many pages starting worker processes costs more than it saves
+_PARALLEL_MIN_PAGES = 4
+# pages submitted ahead of the consumer, finished ones wait in their futures
+_IN_FLIGHT_PAGES = 2 * min(8, os.cpu_count() or 1)
 
 @dataclass
 class RenderSettings:
@@ -54,69 +62,77 @@ class RenderSettings:
     
     background_image: Optional[str] = None
 
-class ExtraRenderParamsDialog(wx.Dialog):
-    def __init__(self, parent):
-        super().__init__(parent, title='Set Extra Parameters:', style=wx.DEFAULT_DIALOG_STYLE)
-        rs = RenderSettings
-        
-        extra_params = {
-            # margins
-            'top':    rs.margin_top,
-            'left':   rs.margin_left,
-            'right':  rs.margin_right,
-            'bottom': rs.margin_bottom,
-            # spacing
-            'line_spacing': rs.line_spacing,
-            'indent_first': rs.indent_first_line,
-        }
-        
-        grid = wx.FlexGridSizer(rows=6, cols=2, vgap=8, hgap=10)
-        grid.AddGrowableCol(1, 1)
-        
-        def add_row(label, key, vmin, vmax):
-            grid.Add(wx.StaticText(self, label=label + ':'), 0, wx.ALIGN_CENTER_VERTICAL)
-            sc = wx.SpinCtrl(self, min=vmin, max=vmax, initial=int(extra_params.get(key, 0)))
-            grid.Add(sc, 0, wx.EXPAND)
-            return sc
-        
-        self.sc_top = add_row('Margin Top', 'top', 0, 50)
-        self.sc_left = add_row('Margin Left', 'left', 0, 50)
-        self.sc_right = add_row('Margin Right', 'right', 0, 50)
-        self.sc_bottom = add_row('Margin Bottom', 'bottom', 0, 50)
-        
-        self.sc_line_spacing = add_row('Line Spacing', 'line_spacing', 0, 10)
-        self.sc_indent_first = add_row('Indent First Line', 'indent_first', 0, 50)
-        
-        btns = self.CreateSeparatedButtonSizer(wx.OK | wx.CANCEL)
-        
-        s = wx.BoxSizer(wx.VERTICAL)
-        s.Add(grid, 0, wx.ALL | wx.EXPAND, 12)
-        s.Add(btns, 0, wx.ALL | wx.EXPAND, 12)
-        
-        self.SetSizerAndFit(s)
-        self.CentreOnParent()
-
-    def set_extra_params(self):
-        rs = RenderSettings
-        
-        rs.margin_top    = self.sc_top.GetValue()
-        rs.margin_left   = self.sc_left.GetValue()
-        rs.margin_right  = self.sc_right.GetValue()
-        rs.margin_bottom = self.sc_bottom.GetValue()
-        
-        rs.line_spacing      = self.sc_line_spacing.GetValue()
-        rs.indent_first_line = self.sc_indent_first.GetValue()
-
-@lru_cache(maxsize=64)
-def _cached_gradient(w: int, h: int, c1: tuple[int, int, int], c2: tuple[int, int, int]) -> Image.Image:
+@lru_cache(maxsize=128)
+def _gradient_strip(h: int, c1: tuple[int, int, int], c2: tuple[int, int, int], invert: bool = False) -> Image.Image:
+    # 1 x h strip, callers stretch it to the page width
     mask = Image.linear_gradient('L').resize((1, h))
     
-    r = Image.eval(mask, lambda t: int(c1[0] + (c2[0] - c1[0]) * t / 255))
-    g = Image.eval(mask, lambda t: int(c1[1] + (c2[1] - c1[1]) * t / 255))
-    b = Image.eval(mask, lambda t: int(c1[2] + (c2[2] - c1[2]) * t / 255))
+    # one 768 entry table (R, G, B) applied in a single point() pass
+    lut = [int(c1[c] + (c2[c] - c1[c]) * t / 255) for c in range(3) for t in range(256)]
+    if invert:
+        lut = [255 - v for v in lut]
     
-    grad = Image.merge('RGB', (r, g, b))
-    return grad.resize((w, h), Image.Resampling.BILINEAR)
+    return mask.convert('RGB').point(lut)
+
+@lru_cache(maxsize=16)
+def _bg_template(
+    w: int, h: int, mode: str, bg_color: tuple[int, int, int],
+    grad_start: tuple[int, int, int], grad_end: tuple[int, int, int],
+    frame_color: tuple[int, int, int], frame_thickness: int, invert: bool,
+    background_image: Optional[str], background_image_mtime: Optional[int]
+) -> Image.Image:
+    # the mtime only takes part in the cache key, so an edited image is reloaded
+    
+    # --- invert ---
+    # folded into the colours, only a loaded background image needs a pass over its pixels
+    if invert:
+        bg_color = tuple(255 - c for c in bg_color)
+        frame_color = tuple(255 - c for c in frame_color)
+    
+    # --- background base ---
+    if background_image:
+        try:
+            bg = Image.open(background_image)
+            # JPEG only: let libjpeg decode at a reduced scale, 2x headroom keeps LANCZOS quality
+            bg.draft('RGB', (w * 2, h * 2))
+            base = (
+                bg
+                .convert('RGB')
+                .resize((w, h), Image.Resampling.LANCZOS)
+            )
+            # before the frame, which is drawn in the already inverted colour
+            if invert:
+                base = ImageOps.invert(base)
+        except Exception:
+            base = Image.new('RGB', (w, h), bg_color)
+    
+    elif mode == 'solid':
+        base = Image.new('RGB', (w, h), bg_color)
+    
+    elif mode == 'gradient':
+        base = _gradient_strip(
+            h,
+            grad_start,
+            grad_end,
+            invert
+        ).resize((w, h), Image.Resampling.BILINEAR)
+    
+    else:
+        # fallback
+        base = Image.new('RGB', (w, h), bg_color)
+    
+    # --- frame ---
+    if mode == 'frame':
+        draw = ImageDraw.Draw(base)
+        t = clamp(frame_thickness, 1, 50)
+        # one call fills the whole band, same pixels as t nested 1px outlines
+        draw.rectangle(
+            [0, 0, w - 1, h - 1],
+            outline=frame_color,
+            width=t
+        )
+    
+    return base
 
 def make_background(rs: RenderSettings, page_index: int = 0) -> Image.Image:
     w, h = rs.page_w, rs.page_h
@@ -145,100 +161,91 @@ def make_background(rs: RenderSettings, page_index: int = 0) -> Image.Image:
             rng.randrange(256),
         )
     
-    # --- background base ---
-    if rs.background_image:
+    bg_image, bg_image_mtime = rs.background_image, None
+    if bg_image:
         try:
-            base = (
-                Image.open(rs.background_image)
-                .convert('RGB')
-                .resize((w, h), Image.Resampling.LANCZOS)
-            )
-        except Exception:
-            base = Image.new('RGB', (w, h), rs.bg_color)
-    
-    elif rs.background_mode == 'solid':
-        base = Image.new('RGB', (w, h), rs.bg_color)
-    
-    elif rs.background_mode == 'gradient':
-        base = _cached_gradient(
-            w, h,
-            grad_start,
-            grad_end
-        ).copy()
-    
-    else:
-        # fallback
-        base = Image.new('RGB', (w, h), rs.bg_color)
-    
-    # --- frame ---
-    if rs.background_mode == 'frame':
-        draw = ImageDraw.Draw(base)
-        t = clamp(rs.frame_thickness, 1, 50)
-        for i in range(t):
-            draw.rectangle(
-                [i, i, w - 1 - i, h - 1 - i],
-                outline=frame_color
-            )
-    
-    # --- invert ---
-    if rs.invert:
-        base = ImageOps.invert(base)
-    
-    return base
+            bg_image_mtime = Path(bg_image).stat().st_mtime_ns
+        except OSError:
+            # missing file: the selected solid/gradient/frame mode applies
+            bg_image = None
+    
+    return _bg_template(
+        w, h, rs.background_mode, rs.bg_color,
+        grad_start, grad_end,
+        frame_color, rs.frame_thickness, rs.invert,
+        bg_image, bg_image_mtime
+    ).copy()
+
+_EOL_RE = re.compile(r'\r\n?')
+
+def _normalize_eol(text: str) -> str:
+    # one pass for CRLF and lone CR, none at all for text that is already LF-only
+    if '\r' not in text:
+        return text
+    return _EOL_RE.sub('\n', text)
+
+def _bisect_fit(s: str, get_w: Callable[[str], float], max_width: int) -> int:
+    # longest prefix that fits (at least one char), prefix widths grow with length
+    lo, hi = 1, len(s)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if get_w(s[:mid]) <= max_width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
 
 def split_text_to_lines(text: str, draw: ImageDraw.ImageDraw, font: ImageFont.ImageFont, max_width: int, rs: RenderSettings) -> List[str]:
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = _normalize_eol(text)
+    get_w = make_width_fn(font)
     lines_out = []
     for raw_line in text.split('\n'):
         if raw_line == '':
             lines_out.append('')
             continue
+        # most lines fit as they are, one measurement instead of a token walk
+        if get_w(raw_line) <= max_width:
+            lines_out.append(raw_line)
+            continue
         if not rs.word_wrap:
-            buf = ''
-            for ch in raw_line:
-                cand = buf + ch
-                # w = draw.textlength(cand, font=font)
-                w = get_w(cand, draw, font)
-                if w <= max_width or buf == '':
-                    buf = cand
-                else:
-                    lines_out.append(buf)
-                    buf = ch
-            if buf:
-                lines_out.append(buf)
+            while raw_line:
+                k = _bisect_fit(raw_line, get_w, max_width)
+                lines_out.append(raw_line[:k])
+                raw_line = raw_line[k:]
             continue
         
         words = re.split(r'(\s+)', raw_line)
         cur = ''
+        cur_w = 0.0
         for tok in words:
-            cand = cur + tok
-            # w = draw.textlength(cand, font=font)
-            w = get_w(cand, draw, font)
+            w = cur_w + get_w(tok)
+            if max_width - 2 < w <= max_width + 2:
+                w = get_w(cur + tok)
             if w <= max_width or cur == '':
-                cur = cand
+                cur += tok
+                cur_w = w
             else:
                 lines_out.append(cur.rstrip('\n'))
                 cur = tok.lstrip()
+                cur_w = get_w(cur) if cur else 0.0
         if cur != '':
             lines_out.append(cur.rstrip('\n'))
     return lines_out
 
-def render_text_to_pages(text: str, rs: RenderSettings, start_page_index: int = 0) -> List[Image.Image]:
+@lru_cache(maxsize=32)
+def _font_metrics(font_path: Optional[str], font_size: int) -> Tuple[ImageFont.FreeTypeFont, int, int]:
+    font = load_font(font_path, font_size)
+    ascent, descent = font.getmetrics()
+    return font, ascent, descent
+
+def render_text_to_pages(text: str, rs: RenderSettings, start_page_index: int = 0, executor: Optional[Executor] = None) -> Iterator[Image.Image]:
     PAGEBREAK_TOKEN = '<<PAGEBREAK>>'
     INLINE_PB = '@pb@'
-    font = load_font(rs.font_path, rs.font_size)
+    font, ascent, descent = _font_metrics(rs.font_path, rs.font_size)
     
-    parts: List[str] = []
-    for line in text.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
-        if INLINE_PB in line:
-            segs = line.split(INLINE_PB)
-            for i, seg in enumerate(segs):
-                if seg != '': parts.append(seg)
-                if i != len(segs) - 1: parts.append('\n'+PAGEBREAK_TOKEN+'\n')
-        else:
-            parts.append(line)
-        parts.append('\n')
-    norm = ''.join(parts)
+    # every inline marker becomes a page break token on its own line
+    norm = _normalize_eol(text) + '\n'
+    norm = norm.replace(INLINE_PB, '\n' + PAGEBREAK_TOKEN + '\n')
     
     ml = rs.margin_left
     mr = rs.margin_right
@@ -257,23 +264,24 @@ def render_text_to_pages(text: str, rs: RenderSettings, start_page_index: int =
     max_text_w = max(50, min(rs.page_w, max_text_w))
     max_text_h = max(50, min(rs.page_h, max_text_h))
     
-    ascent, descent = font.getmetrics()
     base_line_h = ascent + descent + rs.line_spacing
     
-    pages = []
-    cur_page_index = start_page_index
-    cur_img = make_background(rs, page_index=cur_page_index)
-    draw = ImageDraw.Draw(cur_img)
+    # layout pass: positions only, pages are rasterized afterwards
+    layout: List[List[Tuple[Tuple[int, int], str]]] = []
+    cur_lines: List[Tuple[Tuple[int, int], str]] = []
     
     x0 = ml_eff
     y = mt_eff
     
+    # loop invariants as locals
+    indent_first = rs.indent_first_line
+    y_limit = rs.margin_top + max_text_h
+    wrap_w = max_text_w - indent_first
+    
     def new_page():
-        nonlocal cur_img, draw, y, cur_page_index
-        pages.append(cur_img)
-        cur_page_index += 1
-        cur_img = make_background(rs, page_index=cur_page_index)
-        draw = ImageDraw.Draw(cur_img)
+        nonlocal cur_lines, y
+        layout.append(cur_lines)
+        cur_lines = []
         y = rs.margin_top
     
     chunks = norm.split('\n')
@@ -283,33 +291,90 @@ def render_text_to_pages(text: str, rs: RenderSettings, start_page_index: int =
             continue
         if raw == '':
             y += base_line_h
-            if y + base_line_h > rs.margin_top + max_text_h:
+            if y + base_line_h > y_limit:
                 new_page()
             continue
         
-        wrapped = split_text_to_lines(raw, draw, font, max_text_w - rs.indent_first_line, rs)
+        wrapped = split_text_to_lines(raw, None, font, wrap_w, rs)
         for li, line in enumerate(wrapped):
             if line == '' and li == 0:
                 y += base_line_h
                 continue
-            indent = rs.indent_first_line if li == 0 else 0
-            draw.text((x0 + indent, y), line, font=font, fill=rs.font_color)
+            indent = indent_first if li == 0 else 0
+            cur_lines.append(((x0 + indent, y), line))
             y += base_line_h
-            if y + base_line_h > rs.margin_top + max_text_h:
+            if y + base_line_h > y_limit:
                 new_page()
-    pages.append(cur_img)
-    return pages
+    layout.append(cur_lines)
+    
+    # layout errors surface here, pages are only drawn as the caller consumes them
+    return _rasterize_pages(rs, start_page_index, layout, executor)
 
-def render_image_to_page(img_path: Path, rs: RenderSettings, for_file: bool = False, page_index: int = 0) -> Image.Image:
-    base = make_background(rs, page_index=page_index)
+def new_render_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    # spawn on every platform: forking the threaded GUI process can deadlock the child
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+def snapshot_settings(rs: RenderSettings) -> RenderSettings:
+    # the GUI passes the RenderSettings class itself, which would pickle by reference;
+    # worker processes need an instance holding the current values
+    return RenderSettings(**{f.name: getattr(rs, f.name) for f in fields(RenderSettings)})
+
+def _rasterize_pages(rs: RenderSettings, start_page_index: int, layout: List[List[Tuple[Tuple[int, int], str]]],
+                     executor: Optional[Executor] = None) -> Iterator[Image.Image]:
+    page_indices = range(start_page_index, start_page_index + len(layout))
+    if len(layout) < _PARALLEL_MIN_PAGES:
+        for idx, lines in zip(page_indices, layout):
+            yield _rasterize_page(rs, idx, lines)
+        return
+    
+    # a caller-owned pool is reused as is, otherwise one lives for this document only
+    fn = partial(_rasterize_page, snapshot_settings(rs))
+    if executor is not None:
+        yield from _map_in_order(executor, fn, page_indices, layout)
+        return
+    
+    with new_render_pool() as ex:
+        yield from _map_in_order(ex, fn, page_indices, layout)
+
+def _map_in_order(ex: Executor, fn: Callable, page_indices: Iterable[int], layout: Iterable) -> Iterator[Image.Image]:
+    # Executor.map submits every page up front; a bounded window keeps only a few
+    # full-size pages alive while the consumer is still saving the earlier ones
+    window = deque()
+    try:
+        for idx, lines in zip(page_indices, layout):
+            window.append(ex.submit(fn, idx, lines))
+            if len(window) >= _IN_FLIGHT_PAGES:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+    finally:
+        # a shared pool outlives this document, only drop what is still queued
+        for fut in window:
+            fut.cancel()
+
+def _rasterize_page(rs: RenderSettings, page_index: int, lines: List[Tuple[Tuple[int, int], str]]) -> Image.Image:
+    font = load_font(rs.font_path, rs.font_size)
+    font_color = rs.font_color
     
+    img = make_background(rs, page_index=page_index)
+    draw_text = ImageDraw.Draw(img).text
+    for xy, line in lines:
+        draw_text(xy, line, font_color, font)
+    return img
+
+def render_image_to_page(img_path: Path, rs: RenderSettings, for_file: bool = False, page_index: int = 0) -> Image.Image:
     try:
         img = Image.open(img_path)
     except Exception:
+        # the page background is only shown on the error page
+        base = make_background(rs, page_index=page_index)
         draw = ImageDraw.Draw(base)
         draw.text((10, 10), f'Failed to open:\n{img_path.name}', fill=(255, 0, 0))
         return base
     
+    # JPEG only, no-op for other formats
+    img.draft('RGB', (rs.max_w * 2, rs.max_h * 2))
+    
     if img.mode not in {'RGB', 'RGBA', 'L', 'LA'}:
         img = img.convert('RGBA')
     
@@ -329,12 +394,17 @@ def render_image_to_page(img_path: Path, rs: RenderSettings, for_file: bool = Fa
     scale = min(bw / iw, bh / ih)
     nw, nh = int(iw * scale), int(ih * scale)
     
-    img = img.convert('RGB')
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
     img = img.resize((nw, nh), Image.Resampling.LANCZOS)
     
+    if (nw, nh) == (bw, bh):
+        return img
+    
     x = (bw - nw) // 2
     y = (bh - nh) // 2
     
-    base = Image.new('RGBA', (bw, bh), (0, 0, 0, 255))
-    base.alpha_composite(img.convert('RGBA'), (x, y))
-    return base.convert('RGB')
+    # img is opaque RGB here, a plain paste onto the black panel is enough
+    base = Image.new('RGB', (bw, bh), (0, 0, 0))
+    base.paste(img, (x, y))
+    return base
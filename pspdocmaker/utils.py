@@ -1,10 +1,16 @@
 # coding: utf-8
 
-from typing import List, Tuple, Optional, Iterable
+from functools import lru_cache
+from typing import List, Tuple, Optional, Iterable, Callable, TYPE_CHECKING
 from pathlib import Path
+import codecs
+import mmap
+import os
 
-import wx
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from PIL import Image, ImageFont, ImageOps
+
+if TYPE_CHECKING:
+    import wx
 
 def clamp(v: int, lo: int, hi: int) -> int:
     return max(lo, min(hi, v))
@@ -23,15 +29,20 @@ def hex_to_rgb(h: str) -> Tuple[int, int, int]:
     except ValueError:
         return (255, 255, 255) # Fallback
 
-def wx_col_to_hex(c: wx.Colour) -> str:
+def wx_col_to_hex(c: 'wx.Colour') -> str:
     return '#{:02x}{:02x}{:02x}'.format(c.Red(), c.Green(), c.Blue())
 
+_ENCODING_PROBE_SIZE = 0x10000
+
 def detect_text_encoding(path: Path) -> str:
-    raw = path.read_bytes()
+    # the first 64 KB decide, callers read the text with errors='replace' anyway
+    with path.open('rb') as f:
+        raw = f.read(_ENCODING_PROBE_SIZE)
     if raw.startswith(b'\xef\xbb\xbf'):
         return 'utf-8-sig'
     try:
-        raw.decode('utf-8')
+        # a multi-byte sequence may be cut at the probe end, only a full read is final
+        codecs.getincrementaldecoder('utf-8')().decode(raw, final=len(raw) < _ENCODING_PROBE_SIZE)
         return 'utf-8'
     except Exception:
         pass
@@ -43,31 +54,63 @@ def detect_text_encoding(path: Path) -> str:
             continue
     return 'latin-1'
 
+@lru_cache(maxsize=256)
+def _cached_encoding(path: str, mtime_ns: int, size: int) -> str:
+    # mtime and size are part of the key, an edited file is probed again
+    return detect_text_encoding(Path(path))
+
+def read_text_file(path: Path) -> str:
+    # decoded straight from a read-only map, no intermediate bytes copy;
+    # line endings are left as they are, the renderer normalizes them
+    with path.open('rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            return ''
+        enc = _cached_encoding(str(path), st.st_mtime_ns, st.st_size)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return str(mm, enc, 'replace')
+
 def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
+def _walk_with_exts(folder: Path, exts: set[str]) -> Iterable[Path]:
+    # filter on the bare name first, Path objects are only built for matches
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in exts:
+                yield Path(root) / name
+
+IMAGE_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp'})
+TEXT_EXTS = frozenset({'.txt'})
+
 def list_image_files(folder: Path) -> List[Path]:
-    exts = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp'}
-    out = []
-    for f in sorted(folder.rglob('*')):
-        if f.is_file() and f.suffix.lower() in exts:
-            out.append(f)
-    return out
+    return sorted(_walk_with_exts(folder, IMAGE_EXTS))
 
 def list_text_files(folder: Path) -> List[Path]:
-    exts = {'.txt'}
-    out = []
-    for f in sorted(folder.rglob('*')):
-        if f.is_file() and f.suffix.lower() in exts:
-            out.append(f)
-    return out
+    return sorted(_walk_with_exts(folder, TEXT_EXTS))
+
+def scan_folder(folder: Path) -> List[Path]:
+    # images, then texts, then DATs, each sorted, from a single walk
+    images, texts, dats = [], [], []
+    buckets = {ext: images for ext in IMAGE_EXTS}
+    buckets.update({ext: texts for ext in TEXT_EXTS})
+    buckets['.dat'] = dats
+    
+    for root, _, files in os.walk(folder):
+        for name in files:
+            bucket = buckets.get(os.path.splitext(name)[1].lower())
+            if bucket is not None:
+                bucket.append(Path(root) / name)
+    
+    return sorted(images) + sorted(texts) + sorted(dats)
 
 def is_dat_file(p: Path) -> bool:
     return p.suffix.lower() == '.dat'
 
-width_cache: dict[tuple[str, int], float] = {}
-def get_w(s, draw: ImageDraw.ImageDraw, font: ImageFont.ImageFont):
-    key = (s, id(font))
-    if key not in width_cache:
-        width_cache[key] = draw.textlength(s, font=font)
-    return width_cache[key]
+@lru_cache(maxsize=8)
+def make_width_fn(font: ImageFont.ImageFont) -> Callable[[str], float]:
+    # one bounded width cache per font object, dropped together with the font
+    @lru_cache(maxsize=16384)
+    def get_w(s: str) -> float:
+        return font.getlength(s)
+    return get_w
@@ -2,15 +2,21 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import io
 import os
 import re
 import sys
 import shutil
+import json
+import time
 import threading
-import configparser
+import multiprocessing
 
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Tuple, Optional, Iterable
+from typing import List, Tuple, Optional, Iterable, Iterator
 
 # ---------------------------
 # Dependencies
@@ -24,7 +30,7 @@ except ImportError as e:
     raise SystemExit('This app requires wxPython. Install with: pip install wxpython') from e
 
 try:
-    from PIL import Image, ImageDraw, ImageFont, ImageOps
+    from PIL import Image, ImageDraw, ImageOps
 except ImportError as e:
     raise SystemExit('This app requires Pillow. Install with: pip install pillow') from e
 
@@ -32,20 +38,21 @@ except ImportError as e:
 # User Modules
 # ---------------------------
 
-from pspdocmaker.font_resolver import FontResolver
-from pspdocmaker.psp_docdat import POPS_VER_KEY, extract_pngs_from_dat, pack_pngs_to_dat, iter_png_blobs_from_dat
+from pspdocmaker.font_resolver import FontResolver, load_font, font_face_name
+from pspdocmaker.psp_docdat import POPS_VER_KEY, extract_pngs_from_dat, pack_png_blobs_to_dat, iter_png_blobs_from_dat
 
 from pspdocmaker.render import (
-    RenderSettings, _cached_gradient,
+    RenderSettings,
     make_background, render_image_to_page,
-    split_text_to_lines, render_text_to_pages,
-    ExtraRenderParamsDialog,
+    split_text_to_lines, render_text_to_pages, snapshot_settings,
+    new_render_pool,
 )
+from pspdocmaker.dialogs import ExtraRenderParamsDialog
 
 from pspdocmaker.utils import (
-    rgb_to_hex, hex_to_rgb, wx_col_to_hex, detect_text_encoding,
-    ensure_dir, list_image_files, list_text_files, is_dat_file,
-    width_cache,
+    rgb_to_hex, hex_to_rgb, wx_col_to_hex, read_text_file,
+    ensure_dir, scan_folder, is_dat_file,
+    make_width_fn,
 )
 
 # ---------------------------
@@ -53,8 +60,71 @@ from pspdocmaker.utils import (
 # ---------------------------
 
 APP_NAME    = 'PSP DocMaker NX (GUI)'
-CONFIG_FILE = 'pspdocmaker-config.ini'
-GAMEID_PATTERN = re.compile(r"^[A-Za-z]{4}\d{5}$")
+CONFIG_FILE = 'pspdocmaker-config.json'
+LEGACY_CONFIG_FILE = 'pspdocmaker-config.ini'
+
+# image inputs are rendered in worker processes from this many files on
+PARALLEL_MIN_IMAGES = 4
+# decoded preview pages kept in memory
+PREVIEW_CACHE_PAGES = 32
+# full quality preview scales from this many output pixels on run off the GUI thread
+PREVIEW_ASYNC_PIXELS = 300_000
+
+def _is_game_id(s: str) -> bool:
+    # 4 ascii letters + 5 digits
+    return len(s) == 9 and s.isascii() and s[:4].isalpha() and s[4:].isdigit()
+
+# game id input filters, each one a single C-level pass; once cleaned and
+# upper-cased only A-Z and 0-9 are left, so each position drops the other class
+_GID_CLEAN      = re.compile(r'[^A-Za-z0-9]')
+_GID_DROP_DIGIT = str.maketrans('', '', '0123456789')
+_GID_DROP_ALPHA = str.maketrans('', '', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+# ---------------------------
+# Tooltips
+# ---------------------------
+
+TT_DOC_TYPE = (
+    'Manual Format:\n'
+    '• PS1 Game (EBOOT.BIN)\n'
+    '• PSP / PS Minis'
+)
+
+TT_KEYSBIN = (
+    'Open KEYS.BIN, required for official PS1 Manuals\n'
+    '• Must be exactly 16 bytes\n'
+    '• Binary format\n'
+    '• No padding\n\n'
+    'Current KEY:\n'
+)
+
+TT_SIZE = (
+    'Converted Text2Image image size\n'
+    'Not applied to images, they always max sized'
+)
+
+TT_WRAP = (
+    'Lines are wrapped across the screen by words\n'
+    'Unchecked this if you have a specially prepared text file'
+)
+
+TT_MERGE = (
+    'If checked: All files from the list are converted into one project.\n'
+    'Otherwise only selected file(s) in the list will be converted'
+)
+
+TT_KEEP = 'Do not delete _tmp_pages folder after DOCUMENT.DAT creation'
+
+TT_SET_EXTRA = 'Set first line indent, text margins and line spacing'
+
+def keys_tooltip(key_hex: str) -> str:
+    # the only tooltip that depends on state, the key is its last line
+    return TT_KEYSBIN + key_hex
+
+def _decode_preview_page(p: Path) -> Image.Image:
+    # no wx involved, also used to prefetch pages on the io pool
+    with Image.open(p) as im:
+        return im.convert(im.mode if im.mode in ('RGB', 'RGBA') else 'RGBA')
 
 # ---------------------------
 # UI: Main Application
@@ -67,8 +137,6 @@ class MainFrame(wx.Frame):
         
         self.panel = wx.Panel(self)
         
-        self.key_bytes = POPS_VER_KEY
-        
         self.base_dir = Path.cwd()
         self.temp_dir = self.base_dir / '_tmp_pages'
         
@@ -76,14 +144,43 @@ class MainFrame(wx.Frame):
         self.preview_pages: List[Path] = []
         self.preview_index = 0
         self.preview_bitmap = None
+        # decoded pages at their native size (LRU), resizes only rescale them;
+        # the generation tells late prefetches from an older render apart
+        self._decoded_pages: OrderedDict[Path, Image.Image] = OrderedDict()
+        self._preview_gen = 0
+        self._prefetching = set()
+        # large preview scales, only the latest requested one is shown
+        self._scale_pool = ThreadPoolExecutor(max_workers=1)
+        self._scale_pending = None
+        # last scaled bitmap: ((page, w, h, resample), wx.Bitmap)
+        self._bmp_cache = None
+        # set while a window drag is in progress, scaling stays cheap until it settles
+        self._resizing = False
+        self._resize_timer = None
+        self._extra_dialog = None
+        self._last_yield = 0.0
         
         self.doc_sizes = {
             0: ['480x248', '480x272', '480x480'],
             1: ['480x248', '480x272', '480x480', '480x960'],
         }
+        # 'WxH' -> (w, h), parsed once
+        self._size_lookup = {
+            s: tuple(map(int, s.split('x')))
+            for sizes in self.doc_sizes.values() for s in sizes
+        }
         
         self.doc_game_id = 'PSDM02025'
-        self.cfg = configparser.ConfigParser()
+        self.cfg = {}
+        
+        # background file work (DAT extraction), results come back via wx.CallAfter;
+        # capped at 8, beyond that parallel DATs only compete for the same disk
+        self._io_pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+        # rendering, kept for the whole session so worker processes start once;
+        # they are only spawned when the first job is submitted
+        self._render_workers = min(8, os.cpu_count() or 1)
+        self._render_pool = new_render_pool(self._render_workers)
+        self.Bind(wx.EVT_CLOSE, self._on_close)
         
         font = wx.Font(
             10,
@@ -95,15 +192,47 @@ class MainFrame(wx.Frame):
         self.SetFont(font)
         self._init_ui()
         
+        self.Center()
+        
+        # show the window first, config and font lookup run once the loop is idle
+        self._set_ui_busy(True)
+        self.st_status.SetLabel('Loading config...')
+        wx.CallAfter(self._deferred_init)
+    
+    def _on_close(self, event):
+        # queued work is dropped, running workers are not waited for
+        self._render_pool.shutdown(wait=False, cancel_futures=True)
+        self._scale_pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        event.Skip()
+    
+    def _replace_broken_render_pool(self, pool):
+        # a worker that died (OOM, killed) breaks the pool for good, start a fresh
+        # one so only the current job fails; the identity check keeps it to one swap
+        if self._render_pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._render_pool = new_render_pool(self._render_workers)
+    
+    def _deferred_init(self):
         self._load_config()
-        self._apply_config()
+        
+        self.panel.Freeze()
+        try:
+            self._apply_config()
+        finally:
+            self.panel.Thaw()
         
         self.font_resolver = FontResolver()
         self._ensure_default_font()
-        
-        self.Center()
+    
+    def _on_font_ready(self):
+        self._set_ui_busy(False)
+        self.st_status.SetLabel('Ready')
     
     def _init_ui(self):
+        # no layout passes while the widgets are created, one at the end
+        self.panel.Freeze()
+        
         main_win = wx.BoxSizer(wx.HORIZONTAL)
         
         # --- LEFT PANEL: Files ---
@@ -155,19 +284,13 @@ class MainFrame(wx.Frame):
         right_panel.SetMinSize((540, -1))
         
         # --- Preview Panel ---
-        self.preview_panel = wx.Panel(self.panel)
-        self.preview_panel.SetBackgroundColour(wx.BLACK)
-        self.preview_canvas = wx.StaticBitmap(self.preview_panel)
-        
-        pv_inner = wx.BoxSizer(wx.VERTICAL)
-        pv_inner.AddStretchSpacer()
-        pv_inner.Add(self.preview_canvas, 0, wx.ALIGN_CENTER)
-        pv_inner.AddStretchSpacer()
-        pv_sizer = wx.BoxSizer(wx.VERTICAL)
-        pv_sizer.Add(pv_inner, 1, wx.EXPAND)
-        self.preview_panel.SetSizer(pv_sizer)
+        # painted by hand into a buffer: one blit per update, no erase flicker
+        self.preview_panel = wx.Panel(self.panel, style=wx.FULL_REPAINT_ON_RESIZE)
+        self.preview_panel.SetBackgroundStyle(wx.BG_STYLE_PAINT)
+        self.preview_panel.SetDoubleBuffered(True)
         
         right_panel.Add(self.preview_panel, 1, wx.EXPAND | wx.ALL, 5)
+        self.preview_panel.Bind(wx.EVT_PAINT, self._on_preview_paint)
         self.preview_panel.Bind(wx.EVT_SIZE, self._on_preview_resize)
         
         # Prev/Next
@@ -217,20 +340,8 @@ class MainFrame(wx.Frame):
         self.btn_keyreset.Bind(wx.EVT_BUTTON, self._reset_keysbin)
         self.btn_setgameid.Bind(wx.EVT_BUTTON, self.on_setgameid)
         
-        self.doc_type.SetToolTip(
-            'Manual Format:\n'
-            '• PS1 Game (EBOOT.BIN)\n'
-            '• PSP / PS Minis'
-        )
-        
-        self.btn_keysbin.SetToolTip(
-            'Open KEYS.BIN, required for official PS1 Manuals\n'
-            '• Must be exactly 16 bytes\n'
-            '• Binary format\n'
-            '• No padding\n\n'
-            'Current KEY:\n'
-            f'{self.key_bytes.hex(' ').upper()}'
-        )
+        self.doc_type.SetToolTip(TT_DOC_TYPE)
+        self._set_key(POPS_VER_KEY)
         
         # Row 2: Size, Wrap, Merge, Keep
         st_size = wx.StaticText(self.panel, label='Size:')
@@ -245,24 +356,10 @@ class MainFrame(wx.Frame):
         row2.Add(self.chk_merge, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 10)
         row2.Add(self.chk_keep,  0, wx.ALIGN_CENTER_VERTICAL)
         
-        self.ch_size.SetToolTip(
-            'Converted Text2Image image size\n'
-            'Not applied to images, they always max sized'
-        )
-        
-        self.chk_wrap.SetToolTip(
-            'Lines are wrapped across the screen by words\n'
-            'Unchecked this if you have a specially prepared text file'
-        )
-        
-        self.chk_merge.SetToolTip(
-            'If checked: All files from the list are converted into one project.\n'
-            'Otherwise only selected file(s) in the list will be converted'
-        )
-        
-        self.chk_keep.SetToolTip(
-            'Do not delete _tmp_pages folder after DOCUMENT.DAT creation'
-        )
+        self.ch_size.SetToolTip(TT_SIZE)
+        self.chk_wrap.SetToolTip(TT_WRAP)
+        self.chk_merge.SetToolTip(TT_MERGE)
+        self.chk_keep.SetToolTip(TT_KEEP)
         
         # Row 3: Font Controls
         st_font_size        = wx.StaticText(self.panel, label='Font Size:')
@@ -271,7 +368,7 @@ class MainFrame(wx.Frame):
         self.btn_font_color = wx.Button(self.panel, label='Font Color')
         self.btn_set_extra = wx.Button(self.panel, label='Set extra parameters...')
         
-        self.btn_set_extra.SetToolTip('Set first line indent, text margins and line spacing')
+        self.btn_set_extra.SetToolTip(TT_SET_EXTRA)
         
         row3.Add(st_font_size,        0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
         row3.Add(self.spn_font_size,  0, wx.RIGHT, 10)
@@ -375,39 +472,147 @@ class MainFrame(wx.Frame):
         main_win.Add(right_panel, 1, wx.EXPAND | wx.ALL, 5)
         
         self.panel.SetSizer(main_win)
+        
+        # controls disabled while background work runs, see _set_ui_busy
+        self._busy_controls = (
+            # files / folders
+            self.lst_files,
+            self.btn_add_files,
+            self.btn_add_folder,
+            self.btn_remove,
+            self.btn_up,
+            self.btn_down,
+            self.btn_clear,
+            self.btn_setgameid,
+            # preview
+            self.btn_prev,
+            self.btn_next,
+            # doc specific
+            self.doc_type,
+            self.btn_keysbin,
+            self.btn_keyreset,
+            # set text
+            self.ch_size,
+            self.chk_wrap,
+            self.chk_merge,
+            self.chk_keep,
+            self.spn_font_size,
+            self.btn_font_path,
+            self.btn_font_color,
+            self.btn_set_extra,
+            # set background
+            self.ch_bg_mode,
+            self.chk_invert,
+            self.chk_rand_grad,
+            self.chk_rand_frame,
+            self.btn_bg_solid,
+            self.btn_bg_start,
+            self.btn_bg_end,
+            self.btn_bg_frame,
+            self.spn_frame_thick,
+            self.btn_bg_img,
+            self.btn_clr_bg_img,
+            # buttons
+            self.btn_preview,
+            self.btn_create,
+            self.btn_extract,
+            self.btn_save_cfg,
+        )
+        
+        self.panel.Thaw()
+        self.panel.Layout()
     
     # ---------------------------
     # Config Logic
     # ---------------------------
+    
+    # checkbox <-> bool option: (section, option, widget attribute, default)
+    _CFG_FLAGS = [
+        ('General',    'merge_files',     'chk_merge',      False),
+        ('General',    'keep_temp',       'chk_keep',       False),
+        ('Layout',     'word_wrap',       'chk_wrap',       True),
+        ('Background', 'invert',          'chk_invert',     False),
+        ('Background', 'random_gradient', 'chk_rand_grad',  False),
+        ('Background', 'random_frame',    'chk_rand_frame', False),
+    ]
+    
+    # remaining saved options: (section, option, getter)
+    _CFG_BINDINGS = [
+        ('Font', 'size',  lambda s: s.spn_font_size.GetValue()),
+        ('Font', 'color', lambda s: s.current_font_color),
+        ('Font', 'path',  lambda s: s.current_font_path),
+        
+        ('Layout', 'margin_top',    lambda s: RenderSettings.margin_top),
+        ('Layout', 'margin_left',   lambda s: RenderSettings.margin_left),
+        ('Layout', 'margin_right',  lambda s: RenderSettings.margin_right),
+        ('Layout', 'margin_bottom', lambda s: RenderSettings.margin_bottom),
+        ('Layout', 'line_spacing',  lambda s: RenderSettings.line_spacing),
+        ('Layout', 'indent',        lambda s: RenderSettings.indent_first_line),
+        
+        ('Background', 'mode',            lambda s: s.ch_bg_mode.GetStringSelection()),
+        ('Background', 'frame_thickness', lambda s: s.spn_frame_thick.GetValue()),
+        ('Background', 'solid_color',     lambda s: s.bg_solid),
+        ('Background', 'grad_start',      lambda s: s.bg_start),
+        ('Background', 'grad_end',        lambda s: s.bg_end),
+        ('Background', 'frame_color',     lambda s: s.bg_frame),
+        ('Background', 'image',           lambda s: s.current_bg_image),
+        
+        ('Output', 'type', lambda s: s.doc_type.GetSelection()),
+        ('Output', 'size', lambda s: s.ch_size.GetStringSelection()),
+    ]
+    
     def _load_config(self):
         p = self.base_dir / CONFIG_FILE
+        legacy = self.base_dir / LEGACY_CONFIG_FILE
         if p.exists():
             try:
-                self.cfg.read(p, encoding='utf-8')
-            except Exception:
-                self.cfg.read(p)
+                self.cfg = json.loads(p.read_bytes())
+            except (OSError, ValueError):
+                self.cfg = {}
+        elif legacy.exists():
+            self.cfg = self._load_legacy_config(legacy)
+        
+        if not isinstance(self.cfg, dict):
+            self.cfg = {}
         for sec in ('General', 'Font', 'Layout', 'Background', 'Output'):
-            if sec not in self.cfg:
+            if not isinstance(self.cfg.get(sec), dict):
                 self.cfg[sec] = {}
     
+    @staticmethod
+    def _load_legacy_config(p):
+        # old ini settings, written back as json on the next save
+        import configparser
+        ini = configparser.ConfigParser(interpolation=None)
+        try:
+            ini.read(p, encoding='utf-8')
+        except Exception:
+            return {}
+        return {sec: dict(ini[sec]) for sec in ini.sections()}
+    
     def _save_config_file(self):
         p = self.base_dir / CONFIG_FILE
         try:
-            with p.open('w', encoding='utf-8') as f:
-                self.cfg.write(f)
+            p.write_text(json.dumps(self.cfg, indent=2, ensure_ascii=False), encoding='utf-8')
         except Exception as e:
             wx.MessageBox(f'Failed to save config:\n{e}', 'Error', wx.ICON_ERROR)
     
+    def get_bool(self, section, option, default):
+        # ini imports keep '1'/'0' strings
+        v = self.cfg[section].get(option, default)
+        if isinstance(v, str):
+            return v.strip().lower() in ('1', 'yes', 'true', 'on')
+        return bool(v)
+    
     def get_int_clamped(self, section, option, default, min_v=None, max_v=None):
         try:
-            v = self.cfg.getint(section, option, fallback=default)
-        except (ValueError, configparser.Error):
+            v = int(self.cfg[section].get(option, default))
+        except (TypeError, ValueError):
             v = default
         
-        if min_v is not None and v < min_v:
-            v = min_v
-        if max_v is not None and v > max_v:
-            v = max_v
+        if min_v is not None:
+            v = max(min_v, v)
+        if max_v is not None:
+            v = min(max_v, v)
         return v
     
     def _apply_config(self):
@@ -421,11 +626,10 @@ class MainFrame(wx.Frame):
         sel_size = self.cfg['Output'].get('size', doc_sizes[0]).strip()
         self.update_doc_sizes_widget(doc_type, sel_size)
         
-        self.chk_wrap.SetValue(self.cfg['Layout'].getboolean('word_wrap', fallback=True))
-        self.chk_merge.SetValue(self.cfg['General'].getboolean('merge_files', fallback=False))
-        self.chk_keep.SetValue(self.cfg['General'].getboolean('keep_temp', fallback=False))
+        for sec, opt, attr, default in self._CFG_FLAGS:
+            getattr(self, attr).SetValue(self.get_bool(sec, opt, default))
         
-        self.spn_font_size.SetValue(int(self.cfg['Font'].get('size', str(RenderSettings.font_size))))
+        self.spn_font_size.SetValue(self.get_int_clamped('Font', 'size', RenderSettings.font_size))
         
         rs = RenderSettings
         rs.margin_top    = self.get_int_clamped('Layout', 'margin_top',    rs.margin_top   , 0, 50)
@@ -440,39 +644,35 @@ class MainFrame(wx.Frame):
         idx = self.ch_bg_mode.FindString(bg_mode)
         self.ch_bg_mode.SetSelection(idx if idx != wx.NOT_FOUND else 0)
         
-        self.chk_invert.SetValue(self.cfg['Background'].getboolean('invert', fallback=False))
-        self.chk_rand_grad.SetValue(self.cfg['Background'].getboolean('random_gradient', fallback=False))
-        self.chk_rand_frame.SetValue(self.cfg['Background'].getboolean('random_frame', fallback=False))
-        self.spn_frame_thick.SetValue(int(self.cfg['Background'].get('frame_thickness', str(RenderSettings.frame_thickness))))
+        self.spn_frame_thick.SetValue(self.get_int_clamped('Background', 'frame_thickness', RenderSettings.frame_thickness))
         
         # Store colors in temp vars for retrieval, widgets don't show color directly except via dialog
-        self.current_font_color = self.cfg['Font'].get('color', '#ffffff')
-        self.bg_solid = self.cfg['Background'].get('solid_color', '#000000')
-        self.bg_start = self.cfg['Background'].get('grad_start', '#0a0a0a')
-        self.bg_end = self.cfg['Background'].get('grad_end', '#404040')
-        self.bg_frame = self.cfg['Background'].get('frame_color', '#ffffff')
+        self._set_color('current_font_color', self.cfg['Font'].get('color', '#ffffff'))
+        self._set_color('bg_solid', self.cfg['Background'].get('solid_color', '#000000'))
+        self._set_color('bg_start', self.cfg['Background'].get('grad_start', '#0a0a0a'))
+        self._set_color('bg_end', self.cfg['Background'].get('grad_end', '#404040'))
+        self._set_color('bg_frame', self.cfg['Background'].get('frame_color', '#ffffff'))
         cfg_font = self.cfg['Font'].get('path', '').strip()
         
         if cfg_font:
             self.current_font_path = cfg_font
         
-        self.current_bg_image = self.cfg['Background'].get('image', '')
+        self._set_bg_image(self.cfg['Background'].get('image', ''))
     
     def _gather_render_settings(self) -> RenderSettings:
         rs = RenderSettings
         
         size = self.ch_size.GetStringSelection()
-        rs.page_w, rs.page_h = map(int, size.split('x'))
+        rs.page_w, rs.page_h = self._size_lookup[size]
         
         doc_type = self.doc_type.GetSelection()
-        doc_size = self.doc_sizes[doc_type][-1]
-        rs.max_w, rs.max_h = map(int, doc_size.split('x'))
+        rs.max_w, rs.max_h = self._size_lookup[self.doc_sizes[doc_type][-1]]
         rs.panel_w, rs.panel_h = self.preview_panel.GetClientSize()
         
         rs.word_wrap = self.chk_wrap.GetValue()
         
         rs.font_size = self.spn_font_size.GetValue()
-        rs.font_color = hex_to_rgb(self.current_font_color)
+        rs.font_color = self.current_font_color_rgb
         rs.font_path = self.current_font_path if self.current_font_path else None
         
         rs.background_mode = self.ch_bg_mode.GetStringSelection()
@@ -481,46 +681,20 @@ class MainFrame(wx.Frame):
         rs.random_style_frame = self.chk_rand_frame.GetValue()
         rs.frame_thickness = self.spn_frame_thick.GetValue()
         
-        rs.bg_color = hex_to_rgb(self.bg_solid)
-        rs.grad_start = hex_to_rgb(self.bg_start)
-        rs.grad_end = hex_to_rgb(self.bg_end)
-        rs.frame_color = hex_to_rgb(self.bg_frame)
-        rs.background_image = self.current_bg_image if Path(self.current_bg_image).exists() else None
+        rs.bg_color = self.bg_solid_rgb
+        rs.grad_start = self.bg_start_rgb
+        rs.grad_end = self.bg_end_rgb
+        rs.frame_color = self.bg_frame_rgb
+        # make_background checks the file on every page, a missing one is ignored
+        rs.background_image = self.current_bg_image or None
         
         return rs
     
     def on_save_settings(self, event):
-        self.cfg['General']['merge_files'] = '1' if self.chk_merge.GetValue() else '0'
-        self.cfg['General']['keep_temp'] = '1' if self.chk_keep.GetValue() else '0'
-        
-        self.cfg['Font']['size'] = str(self.spn_font_size.GetValue())
-        self.cfg['Font']['color'] = self.current_font_color
-        self.cfg['Font']['path'] = self.current_font_path
-        
-        self.cfg['Layout']['word_wrap'] = '1' if self.chk_wrap.GetValue() else '0'
-        
-        rs = RenderSettings
-        self.cfg['Layout']['margin_top']    = str(rs.margin_top)
-        self.cfg['Layout']['margin_left']   = str(rs.margin_left)
-        self.cfg['Layout']['margin_right']  = str(rs.margin_right)
-        self.cfg['Layout']['margin_bottom'] = str(rs.margin_bottom)
-        self.cfg['Layout']['line_spacing']  = str(rs.line_spacing)
-        self.cfg['Layout']['indent']        = str(rs.indent_first_line)
-        
-        self.cfg['Background']['mode'] = self.ch_bg_mode.GetStringSelection()
-        self.cfg['Background']['invert'] = '1' if self.chk_invert.GetValue() else '0'
-        self.cfg['Background']['random_gradient'] = '1' if self.chk_rand_grad.GetValue() else '0'
-        self.cfg['Background']['random_frame'] = '1' if self.chk_rand_frame.GetValue() else '0'
-        self.cfg['Background']['frame_thickness'] = str(self.spn_frame_thick.GetValue())
-        
-        self.cfg['Background']['solid_color'] = self.bg_solid
-        self.cfg['Background']['grad_start'] = self.bg_start
-        self.cfg['Background']['grad_end'] = self.bg_end
-        self.cfg['Background']['frame_color'] = self.bg_frame
-        self.cfg['Background']['image'] = self.current_bg_image
-        
-        self.cfg['Output']['type'] = str(self.doc_type.GetSelection())
-        self.cfg['Output']['size'] = self.ch_size.GetStringSelection()
+        for sec, opt, attr, _ in self._CFG_FLAGS:
+            self.cfg[sec][opt] = getattr(self, attr).GetValue()
+        for sec, opt, getter in self._CFG_BINDINGS:
+            self.cfg[sec][opt] = getter(self)
         
         self._save_config_file()
         wx.MessageBox('Settings saved successfully.', 'Info', wx.OK | wx.ICON_INFORMATION)
@@ -561,13 +735,14 @@ class MainFrame(wx.Frame):
         self._apply_doc_type_ui(value)
     
     def _on_set_extra(self, event):
-        dlg = ExtraRenderParamsDialog(self.panel)
+        # created on first use and kept, it is destroyed together with the panel
+        if self._extra_dialog is None:
+            self._extra_dialog = ExtraRenderParamsDialog(self.panel)
+        else:
+            self._extra_dialog.load_extra_params()
         
-        try:
-            if dlg.ShowModal() == wx.ID_OK:
-                dlg.set_extra_params()
-        finally:
-            dlg.Destroy()
+        if self._extra_dialog.ShowModal() == wx.ID_OK:
+            self._extra_dialog.set_extra_params()
     
     # ---------------------------
     # File Management
@@ -601,35 +776,36 @@ class MainFrame(wx.Frame):
                 )
                 return
             
-            self.key_bytes = data
-            
-            tt = self.btn_keysbin.GetToolTipText().splitlines()
-            tt[-1] = data.hex(' ').upper()
-            self.btn_keysbin.SetToolTip('\n'.join(tt))
+            self._set_key(data)
             
             wx.MessageBox(
-                f'Key loaded successfully:\n{data.hex(' ').upper()}',
+                f'Key loaded successfully:\n{self._key_hex_str}',
                 'Key OK',
                 wx.OK | wx.ICON_INFORMATION
             )
     
     def _reset_keysbin(self, e):
-        self.key_bytes = POPS_VER_KEY
-        
-        tt = self.btn_keysbin.GetToolTipText().splitlines()
-        tt[-1] = self.key_bytes.hex(' ').upper()
-        self.btn_keysbin.SetToolTip('\n'.join(tt))
+        self._set_key(POPS_VER_KEY)
         
         wx.MessageBox(
-            f'Key was reset to:\n{self.key_bytes.hex(' ').upper()}',
+            f'Key was reset to:\n{self._key_hex_str}',
             'Key Reset OK',
             wx.OK | wx.ICON_INFORMATION
         )
     
+    def _set_key(self, data: bytes):
+        # the hex form is kept next to the key for the tooltip and messages
+        self.key_bytes = data
+        self._key_hex_str = data.hex(' ').upper()
+        self.btn_keysbin.SetToolTip(keys_tooltip(self._key_hex_str))
+    
     def _refresh_list(self):
-        self.lst_files.Clear()
-        for i, p in enumerate(self.inputs):
-            self.lst_files.Append(f'{i+1:03d}: {p.name}')
+        # one native call for the whole list, layout is recomputed once on Thaw
+        self.lst_files.Freeze()
+        try:
+            self.lst_files.Set([f'{i+1:03d}: {p.name}' for i, p in enumerate(self.inputs)])
+        finally:
+            self.lst_files.Thaw()
     
     def on_add_files(self, event):
         with wx.FileDialog(self, 'Open files', wildcard='Supported files|*.png;*.jpg;*.jpeg;*.bmp;*.gif;*.txt;*.dat|All files|*.*',
@@ -644,36 +820,70 @@ class MainFrame(wx.Frame):
             if dd.ShowModal() == wx.ID_CANCEL:
                 return
             folder = Path(dd.GetPath())
-            paths = list_image_files(folder) + list_text_files(folder) + list(folder.rglob('*.dat'))
+            paths = scan_folder(folder)
             self._process_added_paths(paths)
     
     def _process_added_paths(self, paths: List[Path]):
         dats = [p for p in paths if is_dat_file(p)]
         if dats:
             dlg = wx.MessageDialog(self, 'DAT file(s) detected. Extract PNGs?', 'DAT Detected', wx.YES_NO | wx.ICON_QUESTION)
-            if dlg.ShowModal() == wx.ID_YES:
-                self._set_ui_busy(True)
-                self._update_status('Extracting...')
-                no_png_dats = []
-                for di in range(len(dats)):
-                    out_dir = dats[di].with_suffix('')
-                    extracted = extract_pngs_from_dat(dats[di], out_dir)
-                    if extracted:
-                        self.inputs.extend(extracted)
-                    else:
-                        no_png_dats.append(dats[di].name)
-                self._set_ui_busy(False)
-                if no_png_dats:
-                    wx.MessageBox('No PNGs found in:\n\n' + '\n'.join(no_png_dats), 'Warning', wx.ICON_WARNING)
-                self._update_status('Ready')
+            extract = dlg.ShowModal() == wx.ID_YES
             paths = [p for p in paths if not is_dat_file(p)]
+            if extract:
+                self._extract_added_dats(dats, paths)
+                return
         
+        self._add_input_paths(paths)
+    
+    def _add_input_paths(self, paths: List[Path]):
         for p in paths:
             if p.exists():
                 self.inputs.append(p)
         
         self._refresh_list()
     
+    def _extract_added_dats(self, dats: List[Path], paths: List[Path]):
+        # extract on the io pool, results are collected on the GUI thread and
+        # added in the original order once every DAT is done
+        self._set_ui_busy(True)
+        self.st_status.SetLabel('Extracting...')
+        self.gauge.SetRange(len(dats))
+        self.gauge.SetValue(0)
+        
+        results: List[Optional[List[Path]]] = [None] * len(dats)
+        errors: dict[int, str] = {}
+        pending = len(dats)
+        
+        def on_extracted(di, fut):
+            nonlocal pending
+            try:
+                results[di] = fut.result()
+            except Exception as e:
+                errors[di] = str(e)
+            pending -= 1
+            self.gauge.SetValue(len(dats) - pending)
+            if pending:
+                return
+            
+            no_png_dats = []
+            for di, dat in enumerate(dats):
+                if results[di]:
+                    self.inputs.extend(results[di])
+                elif di in errors:
+                    no_png_dats.append(f'{dat.name} ({errors[di]})')
+                else:
+                    no_png_dats.append(dat.name)
+            
+            self._set_ui_busy(False)
+            if no_png_dats:
+                wx.MessageBox('No PNGs found in:\n\n' + '\n'.join(no_png_dats), 'Warning', wx.ICON_WARNING)
+            self._update_status('Ready')
+            self._add_input_paths(paths)
+        
+        for di, dat in enumerate(dats):
+            fut = self._io_pool.submit(extract_pngs_from_dat, dat, dat.with_suffix(''))
+            fut.add_done_callback(lambda f, di=di: wx.CallAfter(on_extracted, di, f))
+    
     def on_remove(self, event):
         selections = self.lst_files.GetSelections()
         if not selections: return
@@ -716,40 +926,63 @@ class MainFrame(wx.Frame):
                 return wx_col_to_hex(dlg.GetColourData().GetColour())
         return None
     
+    def _set_color(self, attr, hex_color):
+        # keep the parsed tuple next to the hex string, render settings read the tuple
+        setattr(self, attr, hex_color)
+        setattr(self, attr + '_rgb', hex_to_rgb(hex_color))
+    
     def on_pick_font_color(self, e):
         c = self._pick_color('Font Color', self.current_font_color)
-        if c: self.current_font_color = c
+        if c: self._set_color('current_font_color', c)
     
     def on_pick_bg_color(self, e):
         c = self._pick_color('Background Color', self.bg_solid)
-        if c: self.bg_solid = c
+        if c: self._set_color('bg_solid', c)
     
     def on_pick_grad(self, which):
         curr = self.bg_start if which == 'start' else self.bg_end
         c = self._pick_color(f'Gradient {which}', curr)
         if c:
-            if which == 'start': self.bg_start = c
-            else: self.bg_end = c
+            if which == 'start': self._set_color('bg_start', c)
+            else: self._set_color('bg_end', c)
     
     def on_pick_frame_color(self, e):
         c = self._pick_color('Frame Color', self.bg_frame)
-        if c: self.bg_frame = c
+        if c: self._set_color('bg_frame', c)
     
     def _ensure_default_font(self):
         # Ensure a valid default font is selected using FontResolver.
+        # Calls _on_font_ready when done, the system font lookup runs on a worker thread.
         
         cfg_path = self.cfg['Font'].get('path', '').strip()
         if cfg_path:
             try:
-                ImageFont.truetype(cfg_path, self.spn_font_size.GetValue())
+                load_font(cfg_path, self.spn_font_size.GetValue())
                 self.current_font_path = cfg_path
+                self._on_font_ready()
                 return
             except Exception:
                 pass  # fallback below
         
         wx_font = wx.SystemSettings.GetFont(wx.SYS_DEFAULT_GUI_FONT)
+        font_desc = self.font_resolver.describe(wx_font)
+        
+        def worker():
+            try:
+                font_path = self.font_resolver.resolve_face(*font_desc)
+            except Exception:
+                font_path = None
+            wx.CallAfter(self._on_default_font_resolved, font_path)
         
-        font_path = self.font_resolver.resolve(wx_font)
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _on_default_font_resolved(self, font_path):
+        try:
+            self._apply_default_font(font_path)
+        finally:
+            self._on_font_ready()
+    
+    def _apply_default_font(self, font_path):
         if font_path:
             self.current_font_path = font_path
             return
@@ -778,8 +1011,7 @@ class MainFrame(wx.Frame):
         init_font_size = int(self.spn_font_size.GetValue() or RenderSettings.font_size)
         
         try:
-            ft = ImageFont.truetype(self.current_font_path, size=max(1, init_font_size))
-            faceName, _ = ft.getname()
+            faceName = font_face_name(self.current_font_path)
         except Exception:
             faceName = ''
         
@@ -802,6 +1034,8 @@ class MainFrame(wx.Frame):
             
             font_path = self.font_resolver.resolve(wx_font)
             if not font_path:
+                # not remembered, the font may be installed before the next try
+                self.font_resolver.clear_cache()
                 wx.MessageBox(
                     'Cannot locate font file for selected font.\n'
                     'Please choose another font.',
@@ -817,43 +1051,133 @@ class MainFrame(wx.Frame):
     def on_pick_bg_image(self, e):
         with wx.FileDialog(self, 'Select BG Image', wildcard='Images|*.png;*.jpg;*.jpeg;*.bmp', style=wx.FD_OPEN) as fd:
             if fd.ShowModal() == wx.ID_OK:
-                self.current_bg_image = fd.GetPath()
+                self._set_bg_image(fd.GetPath())
     
     def on_clear_bg_image(self, e):
-        self.current_bg_image = ''
+        self._set_bg_image('')
+    
+    def _set_bg_image(self, path):
+        self.current_bg_image = path
     
     # ---------------------------
     # Preview
     # ---------------------------
     def _show_preview_page(self):
         if not self.preview_pages:
-            self.preview_canvas.SetBitmap(wx.NullBitmap)
+            self._set_preview_bitmap(None)
             self.st_page.SetLabel('NO PREVIEW')
             return
         
         p = self.preview_pages[self.preview_index]
         
-        img = wx.Image(str(p), wx.BITMAP_TYPE_ANY)
+        img = self._decoded_pages.get(p)
+        if img is None:
+            img = _decode_preview_page(p)
+            self._remember_page(p, img)
+        else:
+            self._decoded_pages.move_to_end(p)
+        
+        self._prefetch_page((self.preview_index + 1) % len(self.preview_pages))
         
         w, h = self.preview_panel.GetClientSize()
         if w < 10 or h < 10:
             return
         
-        iw, ih = img.GetWidth(), img.GetHeight()
+        iw, ih = img.size
         ratio = min(w / iw, h / ih)
         nw, nh = max(1, int(iw * ratio)), max(1, int(ih * ratio))
         
-        img = img.Scale(nw, nh, wx.IMAGE_QUALITY_HIGH)
-        bmp = wx.Bitmap(img)
-        
-        self.preview_canvas.SetBitmap(bmp)
-        self.preview_bitmap = bmp
-        
         self.st_page.SetLabel(
             f'PREVIEW PAGE: {self.preview_index + 1:04d} / {len(self.preview_pages):04d}'
         )
         
-        self.preview_panel.Layout()
+        resample = Image.BILINEAR if self._resizing else Image.LANCZOS
+        bmp_key = (p, nw, nh, resample)
+        if self._bmp_cache and self.preview_bitmap is self._bmp_cache[1]:
+            # this page at this size is already on screen, a Lanczos one also
+            # stands in for the bilinear drag version: no rescale, no repaint
+            shown = self._bmp_cache[0]
+            if shown[:3] == bmp_key[:3] and (shown[3] == resample or shown[3] == Image.LANCZOS):
+                self._scale_pending = None
+                return
+        
+        if self._bmp_cache and self._bmp_cache[0] == bmp_key:
+            self._scale_pending = None
+            self._set_preview_bitmap(self._bmp_cache[1])
+            return
+        
+        if resample == Image.LANCZOS and nw * nh >= PREVIEW_ASYNC_PIXELS:
+            # Lanczos on a big target runs on the scale thread (Pillow drops the GIL),
+            # the current bitmap stays up until the result arrives
+            if self._scale_pending != bmp_key:
+                self._scale_pending = bmp_key
+                fut = self._scale_pool.submit(img.resize, (nw, nh), resample)
+                fut.add_done_callback(lambda f: wx.CallAfter(self._on_preview_scaled, bmp_key, f))
+            return
+        
+        self._scale_pending = None
+        self._show_scaled(bmp_key, img.resize((nw, nh), resample))
+    
+    def _on_preview_scaled(self, bmp_key, fut):
+        if bmp_key != self._scale_pending or fut.exception() is not None:
+            return
+        self._scale_pending = None
+        self._show_scaled(bmp_key, fut.result())
+    
+    def _show_scaled(self, bmp_key, img):
+        # the raw pixel buffer goes straight into the bitmap, no wx.Image step
+        w, h = img.size
+        if img.mode == 'RGBA':
+            bmp = wx.Bitmap.FromBufferRGBA(w, h, img.tobytes())
+        else:
+            bmp = wx.Bitmap.FromBuffer(w, h, img.tobytes())
+        self._bmp_cache = (bmp_key, bmp)
+        self._set_preview_bitmap(bmp)
+    
+    def _set_preview_bitmap(self, bmp):
+        self.preview_bitmap = bmp
+        self.preview_panel.Refresh()
+    
+    def _on_preview_paint(self, event):
+        dc = wx.AutoBufferedPaintDC(self.preview_panel)
+        dc.SetBackground(wx.BLACK_BRUSH)
+        dc.Clear()
+        
+        bmp = self.preview_bitmap
+        if bmp:
+            w, h = self.preview_panel.GetClientSize()
+            dc.DrawBitmap(bmp, (w - bmp.GetWidth()) // 2, (h - bmp.GetHeight()) // 2)
+    
+    def _remember_page(self, p, img):
+        self._decoded_pages[p] = img
+        self._decoded_pages.move_to_end(p)
+        while len(self._decoded_pages) > PREVIEW_CACHE_PAGES:
+            self._decoded_pages.popitem(last=False)
+    
+    def _prefetch_page(self, index):
+        # decode the page the user most likely flips to next in the background
+        p = self.preview_pages[index]
+        if p in self._decoded_pages or p in self._prefetching:
+            return
+        
+        self._prefetching.add(p)
+        gen = self._preview_gen
+        fut = self._io_pool.submit(_decode_preview_page, p)
+        fut.add_done_callback(lambda f: wx.CallAfter(self._on_page_prefetched, gen, p, f))
+    
+    def _on_page_prefetched(self, gen, p, fut):
+        self._prefetching.discard(p)
+        if gen != self._preview_gen or fut.exception() is not None or p in self._decoded_pages:
+            return
+        self._remember_page(p, fut.result())
+    
+    def _drop_preview_cache(self):
+        # page files are rewritten under the same names on every render
+        self._decoded_pages.clear()
+        self._prefetching.clear()
+        self._preview_gen += 1
+        self._bmp_cache = None
+        self._scale_pending = None
     
     def _preview_step(self, delta):
         if not self.preview_pages:
@@ -862,41 +1186,95 @@ class MainFrame(wx.Frame):
         self._show_preview_page()
     
     def _on_preview_resize(self, event):
+        # a window drag sends a burst of size events: follow it with cheap bilinear
+        # scaling and redo the page in full quality once it settles
         if self.preview_bitmap:
+            self._resizing = True
             self._show_preview_page()
+            if self._resize_timer is not None:
+                self._resize_timer.Stop()
+            self._resize_timer = wx.CallLater(120, self._do_preview_resize)
         event.Skip()
     
+    def _do_preview_resize(self):
+        self._resize_timer = None
+        self._resizing = False
+        if self.preview_bitmap:
+            self._show_preview_page()
+    
     # ---------------------------
     # Rendering & Actions
     # ---------------------------
     def _update_status(self, msg):
         self.st_status.SetLabel(msg)
         # wx.GetApp().Yield()
-        wx.YieldIfNeeded()
+        # re-entering the event loop is capped at ~30 times a second
+        now = time.monotonic()
+        if now - self._last_yield > 0.033:
+            self._last_yield = now
+            wx.YieldIfNeeded()
     
-    def _render_all_logic(self, rs: RenderSettings, files: list[Path], for_file: bool, progress_cb):
-        width_cache.clear()
+    def _render_pages_iter(self, rs: RenderSettings, files: list[Path], for_file: bool, progress_cb) -> Iterator[Image.Image]:
+        # pages are yielded in order as they are ready, so the caller can save and
+        # drop each one instead of holding the whole document in memory
+        make_width_fn.cache_clear()
         self.reset_temp_dir()
         
-        pages: List[Image.Image] = []
-        page_index = 0
-        
-        def add_pages(new_pages):
-            nonlocal page_index
-            for im in new_pages:
-                pages.append(im)
-                page_index += 1
+        pool = self._render_pool
+        n_images = sum(1 for p in files if p.suffix.lower() != '.txt')
+        ex = None
+        if n_images >= PARALLEL_MIN_IMAGES:
+            ex = pool
+            rs_img = snapshot_settings(rs)
+            in_flight = 2 * self._render_workers
         
-        for p in files:
-            progress_cb(f'Rendering {p.name}')
-            if p.suffix.lower() == '.txt':
-                enc = detect_text_encoding(p)
-                text = p.read_text(encoding=enc, errors='replace')
-                add_pages(render_text_to_pages(text, rs, page_index))
-            else:
-                add_pages([render_image_to_page(p, rs, for_file, page_index)])
-        
-        return pages
+        page_index = 0
+        window = deque()
+        try:
+            i = 0
+            while i < len(files):
+                p = files[i]
+                if p.suffix.lower() == '.txt':
+                    progress_cb(f'Rendering {p.name}')
+                    for im in render_text_to_pages(read_text_file(p), rs, page_index, pool):
+                        page_index += 1
+                        yield im
+                    i += 1
+                    continue
+                
+                # a run of images: each one is exactly one page, so their page
+                # indices are known before they are rendered
+                j = i
+                while j < len(files) and files[j].suffix.lower() != '.txt':
+                    j += 1
+                run, i = files[i:j], j
+                
+                if ex is None:
+                    for q in run:
+                        progress_cb(f'Rendering {q.name}')
+                        page_index += 1
+                        yield render_image_to_page(q, rs, for_file, page_index - 1)
+                    continue
+                
+                # worker processes, with a bounded number of pages in flight
+                for k, q in enumerate(run):
+                    window.append((q, ex.submit(render_image_to_page, q, rs_img, for_file, page_index + k)))
+                    if len(window) >= in_flight:
+                        q0, fut = window.popleft()
+                        progress_cb(f'Rendering {q0.name}')
+                        yield fut.result()
+                while window:
+                    q0, fut = window.popleft()
+                    progress_cb(f'Rendering {q0.name}')
+                    yield fut.result()
+                page_index += len(run)
+        except BrokenProcessPool:
+            self._replace_broken_render_pool(pool)
+            raise
+        finally:
+            # the pool outlives this document, only drop what is still queued
+            for _, fut in window:
+                fut.cancel()
     
     def _start_render_thread(self, for_file: bool = False):
         merge = self.chk_merge.GetValue()
@@ -913,9 +1291,7 @@ class MainFrame(wx.Frame):
                     wx.OK | wx.ICON_WARNING,
                 )
                 return
-            files = list()
-            for i in range(len(sel)):
-                files.append(self.inputs[sel[i]])
+            files = [self.inputs[i] for i in sel]
         else:
             files = list(self.inputs)
         
@@ -925,101 +1301,132 @@ class MainFrame(wx.Frame):
         self.st_status.SetLabel('Rendering pages…')
         
         rs = self._gather_render_settings()
+        keep = self.chk_keep.GetValue()
+        # a DAT build only needs page files on disk when they are kept
+        write_files = not for_file or keep
+        pack_args = (self.doc_game_id, self.doc_type.GetSelection(), self.key_bytes, self.dest_dir) if for_file else None
         
         def worker():
+            # render -> save -> pack all run here, only UI updates go through wx.CallAfter
             try:
-                pages = self._render_all_logic(rs, files, for_file, progress_cb)
-                wx.CallAfter(self._on_render_done, pages, for_file)
+                pages = self._render_pages_iter(rs, files, for_file, progress_cb)
+                out_paths, blobs = self._save_pages(pages, for_file, write_files)
+                page_count = len(out_paths) or len(blobs)
             except Exception as e:
                 wx.CallAfter(wx.MessageBox, str(e), 'Render error', wx.ICON_ERROR)
-            finally:
                 wx.CallAfter(self._set_ui_busy, False)
+                return
+            
+            pack_error = None
+            if for_file:
+                wx.CallAfter(self._on_pack_start)
+                game_id, doc_type, key, dest_dir = pack_args
+                try:
+                    # its overwrite questions are asked on the GUI thread
+                    pack_png_blobs_to_dat(game_id, doc_type, key, blobs, dest_dir)
+                except Exception as e:
+                    pack_error = str(e)
+            
+            wx.CallAfter(self._on_all_done, out_paths, page_count, for_file, keep, pack_error)
         
         threading.Thread(target=worker, daemon=True).start()
     
     def _update_progress(self, msg):
         self.st_status.SetLabel(msg)
     
-    def _on_render_done(self, pages, for_file):
-        self.preview_pages.clear()
-        self.gauge.SetRange(len(pages))
-        self.gauge.SetValue(0)
-        self.st_status.SetLabel('Saving pages…')
-        
-        for i, im in enumerate(pages):
-            out = self.temp_dir / f'{i+1:04d}.png'
-            im.save(out, 'PNG', optimize=True)
-            self.preview_pages.append(out)
-            self.st_status.SetLabel(f'Saving pages {i+1}/{len(pages)}...')
-            self.gauge.SetValue(i+1)
-        
-        self.preview_index = 0
-        self._show_preview_page()
-        self.st_status.SetLabel(f'Rendered {len(pages)} pages.')
-        self.gauge.SetValue(self.gauge.GetRange())
-        
-        if for_file:
-            try:
-                self._update_status('Packing DAT...')
-                pack_pngs_to_dat(self.doc_game_id, self.doc_type.GetSelection(), self.key_bytes, self.preview_pages, self.dest_dir)
-                self._update_status('Done.')
-            except Exception as e:
-                wx.MessageBox(str(e), 'Error', wx.ICON_ERROR)
-           
-        if for_file and not self.chk_keep.GetValue():
-            shutil.rmtree(self.temp_dir, ignore_errors=True)
-            
-            self.preview_pages.clear()
-            self.preview_canvas.SetBitmap(wx.NullBitmap)
-            self.st_page.SetLabel('EMPTY')
+    def _save_pages(self, pages: Iterable[Image.Image], for_file: bool, write_files: bool) -> Tuple[List[Path], List[bytes]]:
+        # runs on the render thread; PNG encoding releases the GIL, so pages are
+        # encoded in parallel as they arrive and released once written, progress
+        # is reported through wx.CallAfter.
+        # DAT builds hand the encoded bytes to the packer directly, page files
+        # are only written when write_files is set
+        out_paths: List[Path] = []
+        blobs: List[bytes] = []
+        
+        # pages packed into the DAT keep the smallest encoding, preview-only
+        # pages are temp files and only need to be fast to write
+        save_opts = {'optimize': True} if for_file else {'compress_level': 1}
+        
+        def save(im, out):
+            buf = io.BytesIO()
+            im.save(buf, 'PNG', **save_opts)
+            im.close()
+            data = buf.getvalue()
+            if out is not None:
+                out.write_bytes(data)
+            return data
+        
+        workers = min(8, os.cpu_count() or 1)
+        window = deque()
+        done = 0
+        
+        def collect():
+            nonlocal done
+            data = window.popleft().result()
+            if for_file:
+                blobs.append(data)
+            done += 1
+            wx.CallAfter(self._on_save_progress, done)
+        
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for i, im in enumerate(pages):
+                out = self.temp_dir / f'{i+1:04d}.png' if write_files else None
+                if out is not None:
+                    out_paths.append(out)
+                window.append(ex.submit(save, im, out))
+                del im
+                if len(window) >= 2 * workers:
+                    collect()
+            while window:
+                collect()
+        
+        return out_paths, blobs
+    
+    def _on_save_progress(self, done):
+        self.st_status.SetLabel(f'Saved {done} pages...')
+        self.gauge.Pulse()
+    
+    def _on_pack_start(self):
+        self.st_status.SetLabel('Packing DAT...')
+        self.gauge.Pulse()
+    
+    def _on_all_done(self, out_paths, page_count, for_file, keep, pack_error):
+        try:
+            self.preview_pages = out_paths
+            self._drop_preview_cache()
             self.preview_index = 0
+            self.gauge.SetValue(self.gauge.GetRange())
+            
+            if not for_file:
+                self._show_preview_page()
+                self.st_status.SetLabel(f'Rendered {page_count} pages.')
+                return
+            
+            if pack_error:
+                self.st_status.SetLabel('Ready')
+                wx.MessageBox(pack_error, 'Error', wx.ICON_ERROR)
+            else:
+                self.st_status.SetLabel('Done.')
+            
+            if keep:
+                self._show_preview_page()
+            else:
+                shutil.rmtree(self.temp_dir, ignore_errors=True)
+                
+                self.preview_pages = []
+                self._set_preview_bitmap(None)
+                self.st_page.SetLabel('EMPTY')
+        finally:
+            self._set_ui_busy(False)
     
     def _set_ui_busy(self, busy: bool):
-        for btn in (
-            # files / folders
-            self.lst_files,
-            self.btn_add_files,
-            self.btn_add_folder,
-            self.btn_remove,
-            self.btn_up,
-            self.btn_down,
-            self.btn_clear,
-            self.btn_setgameid,
-            # preview
-            self.btn_prev,
-            self.btn_next,
-            # doc specific
-            self.doc_type,
-            self.btn_keysbin,
-            self.btn_keyreset,
-            # set text
-            self.ch_size,
-            self.chk_wrap,
-            self.chk_merge,
-            self.chk_keep,
-            self.spn_font_size,
-            self.btn_font_path,
-            self.btn_font_color,
-            self.btn_set_extra,
-            # set background
-            self.ch_bg_mode,
-            self.chk_invert,
-            self.chk_rand_grad,
-            self.chk_rand_frame,
-            self.btn_bg_solid,
-            self.btn_bg_start,
-            self.btn_bg_end,
-            self.btn_bg_frame,
-            self.spn_frame_thick,
-            self.btn_bg_img,
-            self.btn_clr_bg_img,
-            # buttons
-            self.btn_preview,
-            self.btn_create,
-            self.btn_extract,
-            self.btn_save_cfg,
-        ):
-            btn.Enable(not busy)
+        # one repaint for all controls instead of one per Enable()
+        self.Freeze()
+        try:
+            for ctrl in self._busy_controls:
+                ctrl.Enable(not busy)
+        finally:
+            self.Thaw()
     
     def on_setgameid(self, event):
         dlg = GameIdDialog(self.panel, self.doc_game_id)
@@ -1050,23 +1457,28 @@ class MainFrame(wx.Frame):
         
         self.reset_temp_dir()
         
+        pool = self._render_pool
         try:
             if p.suffix.lower() == '.txt':
-                enc = detect_text_encoding(p)
-                text = p.read_text(encoding=enc, errors='replace')
-                pages = render_text_to_pages(text, rs)
+                text = read_text_file(p)
+                pages = render_text_to_pages(text, rs, executor=pool)
             else:
                 pages = [render_image_to_page(p, rs)]
             
             self.preview_pages = []
+            self._drop_preview_cache()
             for i, im in enumerate(pages):
                 out = self.temp_dir / f'{i + 1:04d}.png'
-                im.save(out, format='PNG')
+                im.save(out, format='PNG', compress_level=1)
                 self.preview_pages.append(out)
             
             self.preview_index = 0
             self._show_preview_page()
         
+        except BrokenProcessPool as e:
+            self._replace_broken_render_pool(pool)
+            wx.MessageBox(f'{e}\nPlease try again.', 'Error', wx.ICON_ERROR)
+        
         except Exception as e:
             wx.MessageBox(str(e), 'Error', wx.ICON_ERROR)
     
@@ -1089,16 +1501,26 @@ class MainFrame(wx.Frame):
             if dd.ShowModal() == wx.ID_CANCEL: return
             out_dir = Path(dd.GetPath())
         
-        try:
-            self._update_status('Extracting...')
-            files = extract_pngs_from_dat(dat_path, out_dir)
+        self._set_ui_busy(True)
+        self.st_status.SetLabel('Extracting...')
+        self.gauge.Pulse()
+        
+        def on_extracted(fut):
+            self._set_ui_busy(False)
+            self.gauge.SetValue(0)
+            self.st_status.SetLabel('Ready')
+            try:
+                files = fut.result()
+            except Exception as e:
+                wx.MessageBox(str(e), 'Error')
+                return
             if len(files) > 0:
                 wx.MessageBox(f'Extracted {len(files)} images.', 'Success')
             else:
                 wx.MessageBox(f'No PNGs found in:\n\n{dat_path}', 'Warning', wx.ICON_WARNING)
-            self._update_status('Ready')
-        except Exception as e:
-            wx.MessageBox(str(e), 'Error')
+        
+        fut = self._io_pool.submit(extract_pngs_from_dat, dat_path, out_dir)
+        fut.add_done_callback(lambda f: wx.CallAfter(on_extracted, f))
 
 class GameIdDialog(wx.Dialog):
     def __init__(self, parent, GameId):
@@ -1135,19 +1557,10 @@ class GameIdDialog(wx.Dialog):
     def on_text(self, event):
         val = self.txt.GetValue()
         
-        filtered = "".join(ch for ch in val if ch.isalnum()).upper()[:9]
+        filtered = _GID_CLEAN.sub('', val).upper()[:9]
         
         # Enforce per-position constraints
-        out = []
-        for i, ch in enumerate(filtered):
-            if i < 4:
-                if ch.isalpha():
-                    out.append(ch)
-            else:
-                if ch.isdigit():
-                    out.append(ch)
-        
-        new_val = "".join(out)
+        new_val = filtered[:4].translate(_GID_DROP_DIGIT) + filtered[4:].translate(_GID_DROP_ALPHA)
         
         if new_val != val:
             pos = self.txt.GetInsertionPoint()
@@ -1158,7 +1571,7 @@ class GameIdDialog(wx.Dialog):
     
     def on_ok(self, event):
         value = self.txt.GetValue().strip().upper()
-        if not GAMEID_PATTERN.match(value):
+        if not _is_game_id(value):
             wx.MessageBox(
                 "Invalid format.\n\nUse: XXXXYYYYY\n(4 letters + 5 digits)",
                 "Error",
@@ -1172,6 +1585,8 @@ class GameIdDialog(wx.Dialog):
         return self.txt.GetValue().strip().upper()
 
 if __name__ == '__main__':
+    # page rendering uses worker processes, needed for the frozen (pyinstaller) build
+    multiprocessing.freeze_support()
     app = wx.App(False)
     frame = MainFrame()
     frame.Show()